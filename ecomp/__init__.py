@@ -69,16 +69,18 @@ def compress_file(
     output_path: str | Path | None = None,
     metadata_path: str | Path | None = None,
     input_format: str | None = None,
+    checksum_mode: str = "full",
 ) -> Tuple[Path, Path | None]:
     """Compress *input_path* producing an `.ecomp` archive.
 
     Returns ``(archive_path, metadata_copy_path)``. Metadata is embedded inside the
     archive by default; pass *metadata_path* to also persist a JSON sidecar.
+    *checksum_mode* is forwarded to :func:`compress_alignment`.
     """
 
     input_path = Path(input_path)
     frame = read_alignment(input_path, fmt=input_format)
-    compressed = compress_alignment(frame)
+    compressed = compress_alignment(frame, checksum_mode=checksum_mode)
 
     target_path = Path(output_path) if output_path else input_path.with_suffix(".ecomp")
     metadata_file = Path(metadata_path) if metadata_path else None
@@ -116,7 +118,9 @@ def decompress_file(
     frame = decompress_alignment(payload, metadata)
 
     if validate_checksum:
-        checksum = alignment_checksum(frame.sequences)
+        checksum = alignment_checksum(
+            frame.sequences, mode=metadata.get("checksum_mode", "full")
+        )
         expected = metadata.get("checksum_sha256")
         if expected and checksum != expected:
             raise ValueError(
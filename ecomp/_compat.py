@@ -18,6 +18,14 @@ def dataclass(*args, **kwargs):
     return _dataclass(*args, **kwargs)
 
 
+def bit_count(value: int) -> int:
+    """Backport of ``int.bit_count`` for Python < 3.10."""
+
+    if sys.version_info >= (3, 10):
+        return value.bit_count()
+    return bin(value).count("1")
+
+
 _Sentinel = object()
 _T = TypeVar("_T")
 
@@ -37,4 +45,4 @@ def zip_strict(*iterables: Iterable[_T]) -> Iterator[Tuple[_T, ...]]:
         yield values
 
 
-__all__ = ["dataclass", "zip_strict"]
+__all__ = ["bit_count", "dataclass", "zip_strict"]
@@ -12,7 +12,7 @@ from typing import Any, Iterable
 from ._compat import zip_strict
 from .compression.pipeline import compress_alignment, decompress_alignment
 from .config import DEFAULT_OUTPUT_FORMAT
-from .diagnostics.checksums import alignment_checksum
+from .diagnostics.checksums import CHECKSUM_MODES, alignment_checksum
 from .diagnostics.metrics import (
     alignment_length,
     alignment_length_excluding_gaps,
@@ -431,6 +431,33 @@ def _add_rcv_arguments(
     parser.set_defaults(handler=_cmd_rcv)
 
 
+def _add_metrics_summary_arguments(
+    subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+) -> None:
+    help_text = "Report every alignment-level metric as JSON after one decode"
+    parser = subparsers.add_parser(
+        "metrics_summary",
+        aliases=["metrics"],
+        help=help_text,
+        description=help_text,
+    )
+    _attach_help_banner(parser)
+    _register_command(
+        category="Diagnostics",
+        name="metrics_summary",
+        aliases=["metrics"],
+        help_text=help_text,
+    )
+    _add_archive_options(parser)
+    parser.add_argument(
+        "--indent",
+        type=int,
+        default=2,
+        help="Indent width for the JSON output (default: 2)",
+    )
+    parser.set_defaults(handler=_cmd_metrics_summary)
+
+
 def _add_distance_tree_arguments(
     subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
 ) -> None:
@@ -510,6 +537,12 @@ def _add_zip_arguments(subparsers: argparse._SubParsersAction[argparse.ArgumentP
         action="store_true",
         help="Print compression statistics (sizes and ratio)",
     )
+    parser.add_argument(
+        "--checksum-mode",
+        choices=CHECKSUM_MODES,
+        default="full",
+        help="Checksum scheme; 'sharded' hashes large alignments on multiple threads (default: full)",
+    )
     parser.set_defaults(handler=_cmd_zip)
 
 
@@ -661,6 +694,7 @@ def build_parser() -> argparse.ArgumentParser:
     _add_variable_sites_arguments(subparsers)
     _add_percentage_identity_arguments(subparsers)
     _add_rcv_arguments(subparsers)
+    _add_metrics_summary_arguments(subparsers)
     _add_distance_tree_arguments(subparsers)
     _add_zip_arguments(subparsers)
     _add_unzip_arguments(subparsers)
@@ -676,8 +710,11 @@ def build_parser() -> argparse.ArgumentParser:
 
 def _cmd_zip(args: argparse.Namespace) -> int:
     alignment_path = Path(args.alignment).expanduser().resolve()
-    if not alignment_path.exists():
-        raise SystemExit(f"Alignment not found: {alignment_path}")
+    # One stat serves both the existence check and the --stats input size.
+    try:
+        alignment_size = alignment_path.stat().st_size
+    except OSError:
+        raise SystemExit(f"Alignment not found: {alignment_path}") from None
 
     tree_path = Path(args.tree_path).expanduser().resolve() if args.tree_path else None
     if tree_path and not tree_path.exists():
@@ -690,7 +727,7 @@ def _cmd_zip(args: argparse.Namespace) -> int:
         except OSError as exc:
             raise SystemExit(f"Failed to read tree file: {tree_path}") from exc
 
-    compressed = compress_alignment(frame)
+    compressed = compress_alignment(frame, checksum_mode=args.checksum_mode)
     payload = compressed.payload
     metadata = compressed.metadata
     suffix = ALIGNMENT_SUFFIX
@@ -715,7 +752,7 @@ def _cmd_zip(args: argparse.Namespace) -> int:
         print(f"Metadata copy written to {metadata_path}")
 
     if args.stats:
-        original_size = alignment_path.stat().st_size
+        original_size = alignment_size
         compressed_size = output_path.stat().st_size
         ratio = (original_size / compressed_size) if compressed_size else float("inf")
         print(
@@ -920,6 +957,30 @@ def _cmd_rcv(args: argparse.Namespace) -> int:
     return 0
 
 
+def _cmd_metrics_summary(args: argparse.Namespace) -> int:
+    archive_path, metadata_path = _resolve_archive_args(args.archive, args.metadata_path)
+    frame, _ = _load_alignment_from_archive(
+        archive_path, metadata_path, validate_checksum=not args.no_checksum
+    )
+    identity = percentage_identity(frame)
+    payload = {
+        "alignment_length": alignment_length(frame),
+        "alignment_length_excluding_gaps": alignment_length_excluding_gaps(frame),
+        "consensus": majority_rule_consensus(frame),
+        "constant_columns": sum(constant_columns(frame)),
+        "gap_fraction": column_gap_fraction(frame),
+        "parsimony_informative_sites": parsimony_informative_site_count(frame),
+        # JSON has no NaN; report an undefined identity (single sequence) as null.
+        "percentage_identity": None if math.isnan(identity) else identity,
+        "relative_composition_variability": relative_composition_variability(frame),
+        "shannon_entropy": column_shannon_entropy(frame),
+        "variable_sites": variable_site_count(frame),
+    }
+    json.dump(payload, sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    return 0
+
+
 def _cmd_distance_tree(args: argparse.Namespace) -> int:
     archive_path, metadata_path = _resolve_archive_args(args.archive, args.metadata_path)
     frame, _ = _load_alignment_from_archive(
@@ -940,7 +1001,9 @@ def _verify_checksum(sequences: Iterable[str], metadata: dict[str, object]) -> N
     expected = metadata.get("checksum_sha256")
     if not expected:
         return
-    observed = alignment_checksum(sequences)
+    observed = alignment_checksum(
+        sequences, mode=str(metadata.get("checksum_mode", "full"))
+    )
     if observed != expected:
         raise SystemExit(
             "Checksum mismatch after decompression: "
@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import Iterator
+from typing import Iterator, Sequence
+
+import numpy as np
 
 from .._compat import dataclass, zip_strict
 
@@ -21,10 +23,18 @@ class ColumnProfile:
         return self.consensus, self.deviations
 
 
-def iter_column_profiles(frame: AlignmentFrame) -> Iterator[ColumnProfile]:
-    """Yield :class:`ColumnProfile` objects for each column in *frame*."""
+def iter_column_profiles(
+    frame: AlignmentFrame, permutation: Sequence[int] | None = None
+) -> Iterator[ColumnProfile]:
+    """Yield :class:`ColumnProfile` objects for each column in *frame*.
+
+    When *permutation* is given, sequences are visited in that order and deviation
+    indices refer to positions within the permuted order.
+    """
 
     sequences = frame.sequences
+    if permutation is not None:
+        sequences = [sequences[idx] for idx in permutation]
     if not sequences:
         return
 
@@ -39,7 +49,69 @@ def iter_column_profiles(frame: AlignmentFrame) -> Iterator[ColumnProfile]:
         yield ColumnProfile(consensus=consensus_char, deviations=deviations)
 
 
-def collect_column_profiles(frame: AlignmentFrame) -> list[ColumnProfile]:
-    """Compute column profiles eagerly and return them as a list."""
+def collect_column_profiles(
+    frame: AlignmentFrame, permutation: Sequence[int] | None = None
+) -> list[ColumnProfile]:
+    """Compute column profiles eagerly and return them as a list.
+
+    Alignments with a :meth:`~ecomp.io.AlignmentFrame.residue_matrix` are profiled
+    column-wise with NumPy; anything else falls back to :func:`iter_column_profiles`,
+    which yields identical results.
+    """
+
+    matrix = frame.residue_matrix()
+    if matrix is None:
+        return list(iter_column_profiles(frame, permutation))
+    if permutation is not None:
+        matrix = matrix[np.asarray(permutation, dtype=np.intp)]
+    return _matrix_profiles(matrix)
+
+
+def iter_column_profile_windows(
+    frame: AlignmentFrame,
+    permutation: Sequence[int] | None = None,
+    *,
+    window: int,
+) -> Iterator[ColumnProfile]:
+    """Yield the profiles of :func:`collect_column_profiles`, *window* columns at a time.
+
+    Only one window of profiles is materialised at once, so callers that consume the
+    profiles as a stream avoid holding every column in memory.
+    """
 
-    return list(iter_column_profiles(frame))
+    if window <= 0:
+        raise ValueError("window must be a positive number of columns")
+    matrix = frame.residue_matrix()
+    if matrix is None:
+        yield from iter_column_profiles(frame, permutation)
+        return
+    # Permuted rows are gathered one window at a time rather than copying the matrix.
+    rows = slice(None) if permutation is None else np.asarray(permutation, dtype=np.intp)
+    for start in range(0, matrix.shape[1], window):
+        yield from _matrix_profiles(matrix[rows, start : start + window])
+
+
+def _matrix_profiles(matrix: np.ndarray) -> list[ColumnProfile]:
+    if matrix.shape[0] == 0 or matrix.shape[1] == 0:
+        return []
+
+    # Ascending byte order makes argmax resolve count ties to the smallest code point.
+    present = np.flatnonzero(np.bincount(matrix.ravel(), minlength=256))
+    counts = np.empty((present.size, matrix.shape[1]), dtype=np.int64)
+    for row, symbol in enumerate(present):
+        counts[row] = np.count_nonzero(matrix == symbol, axis=0)
+    consensus = present[counts.argmax(axis=0)].astype(np.uint8)
+
+    # Transposing first orders deviations by column, then by sequence index.
+    columns, rows = np.nonzero((matrix != consensus).T)
+    residues = matrix[rows, columns].tobytes().decode("latin-1")
+    pairs = list(zip(rows.tolist(), residues))
+    bounds = np.concatenate(
+        ([0], np.cumsum(np.bincount(columns, minlength=matrix.shape[1])))
+    ).tolist()
+    return [
+        ColumnProfile(consensus=symbol, deviations=tuple(pairs[start:end]))
+        for symbol, start, end in zip(
+            consensus.tobytes().decode("latin-1"), bounds, bounds[1:]
+        )
+    ]
@@ -8,11 +8,21 @@ import struct
 from collections import Counter
 from typing import Any, Sequence
 
+import numpy as np
+
 from .rle import RunLengthBlock
-from .._compat import zip_strict
+from .._compat import bit_count, zip_strict
 
 BLOCK_HEADER_STRUCT = ">BBB"
 BLOCK_HEADER_SIZE = struct.calcsize(BLOCK_HEADER_STRUCT)
+# Below this many codes the bit-at-a-time loops beat numpy's call overhead.
+_VECTOR_PACK_MIN_CODES = 128
+# Below this many values the per-value varint writer beats numpy's call overhead.
+_VECTOR_VARINT_MIN_VALUES = 64
+# Bitmasks at least this long locate their set bits with numpy instead of a bit loop.
+_VECTOR_BITMASK_MIN_BYTES = 8
+# Huffman models with codes up to this long decode through a 2**max_len lookup table.
+_FAST_HUFFMAN_MAX_BITS = 12
 
 
 class EncodingError(RuntimeError):
@@ -137,10 +147,10 @@ def encode_blocks(
         payload.extend(_write_varint(len(mask_payload)))
         payload.extend(mask_payload)
         residues = entry["residues"]
-        payload.extend(struct.pack(">H", len(residues)))
+        payload.extend(len(residues).to_bytes(2, "big"))
         payload.extend(residues)
 
-    payload.extend(struct.pack(">I", len(prepared_blocks)))
+    payload.extend(len(prepared_blocks).to_bytes(4, "big"))
     for block, encoded in zip_strict(prepared_blocks, encoded_bitmasks):
         if not (1 <= block.run_length <= 255):
             raise EncodingError("Run length must be within 1..255 for encoding")
@@ -159,7 +169,7 @@ def encode_blocks(
             payload.extend(_write_varint(deviation_count))
             payload.extend(_write_varint(len(mask_payload)))
             payload.extend(mask_payload)
-            payload.extend(struct.pack(">H", len(block.residues)))
+            payload.extend(len(block.residues).to_bytes(2, "big"))
             payload.extend(block.residues)
     return bytes(payload)
 
@@ -222,6 +232,8 @@ def decode_blocks(
                 "decode_map": decode_map,
                 "max_code_len": max_len,
             }
+            if 0 < max_len <= _FAST_HUFFMAN_MAX_BITS:
+                model["fast_table"] = _huffman_fast_table(decode_map, max_len)
         else:
             raise DecodingError(f"Unknown residue encoding mode {mode}")
         consensus_models[bytes([consensus_value]).decode("ascii")] = model
@@ -247,7 +259,7 @@ def decode_blocks(
         cursor += mask_len
         if cursor + 2 > payload_length:
             raise DecodingError("Dictionary residue length truncated")
-        residues_len = struct.unpack(">H", payload[cursor : cursor + 2])[0]
+        residues_len = (payload[cursor] << 8) | payload[cursor + 1]
         cursor += 2
         if cursor + residues_len > payload_length:
             raise DecodingError("Dictionary residues truncated")
@@ -258,7 +270,7 @@ def decode_blocks(
 
     if cursor + 4 > payload_length:
         raise DecodingError("Missing block count")
-    (block_count,) = struct.unpack(">I", payload[cursor : cursor + 4])
+    block_count = int.from_bytes(payload[cursor : cursor + 4], "big")
     cursor += 4
 
     alphabet_lookup = {char: index for index, char in enumerate(alphabet)}
@@ -312,7 +324,7 @@ def decode_blocks(
             cursor += mask_len
             if cursor + 2 > payload_length:
                 raise DecodingError("Literal residue length truncated")
-            residues_len = struct.unpack(">H", payload[cursor : cursor + 2])[0]
+            residues_len = (payload[cursor] << 8) | payload[cursor + 1]
             cursor += 2
             if cursor + residues_len > payload_length:
                 raise DecodingError("Literal residues truncated")
@@ -351,14 +363,13 @@ def _encode_char(char: str) -> bytes:
 
 
 def _popcount(data: bytes) -> int:
-    return sum(bin(byte).count("1") for byte in data)
+    # One big-int popcount instead of a Python-level loop over every byte.
+    return bit_count(int.from_bytes(data, "little"))
 
 
 def _trim_bitmask(bitmask: bytes) -> tuple[bytes, int]:
-    length = len(bitmask)
-    while length > 0 and bitmask[length - 1] == 0:
-        length -= 1
-    return bitmask[:length], length
+    trimmed = bytes(bitmask).rstrip(b"\x00")
+    return trimmed, len(trimmed)
 
 
 def _varint_size(value: int) -> int:
@@ -372,6 +383,11 @@ def _varint_size(value: int) -> int:
 def _write_varint(value: int) -> bytes:
     if value < 0:
         raise EncodingError("varint cannot encode negative values")
+    # One- and two-byte encodings cover nearly every length and count written.
+    if value < 0x80:
+        return bytes((value,))
+    if value < 0x4000:
+        return bytes(((value & 0x7F) | 0x80, value >> 7))
     out = bytearray()
     while True:
         byte = value & 0x7F
@@ -384,7 +400,33 @@ def _write_varint(value: int) -> bytes:
     return bytes(out)
 
 
+def _write_varints(values: Sequence[int]) -> bytes:
+    """Return the concatenated varint encodings of *values*."""
+
+    if len(values) < _VECTOR_VARINT_MIN_VALUES:
+        return b"".join(map(_write_varint, values))
+    if min(values) < 0:
+        raise EncodingError("varint cannot encode negative values")
+    array = np.asarray(values, dtype=np.uint64)
+    sizes = np.ones(array.shape, dtype=np.intp)
+    shift = 7
+    while shift < 64:
+        longer = array >= np.uint64(1 << shift)
+        if not longer.any():
+            break
+        sizes += longer
+        shift += 7
+    # One row of little-endian 7-bit groups per value; high bits flag continuation.
+    groups = np.arange(sizes.max(), dtype=np.intp)
+    digits = ((array[:, None] >> (groups * 7).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    digits[groups < sizes[:, None] - 1] |= 0x80
+    return digits[groups < sizes[:, None]].tobytes()
+
+
 def _read_varint(data: bytes, cursor: int) -> tuple[int, int]:
+    # Single-byte values skip the accumulate loop.
+    if cursor < len(data) and data[cursor] < 0x80:
+        return data[cursor], cursor + 1
     shift = 0
     result = 0
     while True:
@@ -403,6 +445,11 @@ def _read_varint(data: bytes, cursor: int) -> tuple[int, int]:
 def _pack_codes(codes: Sequence[int], bits_per_symbol: int) -> bytes:
     if not codes:
         return b""
+    if len(codes) >= _VECTOR_PACK_MIN_CODES and bits_per_symbol <= 8:
+        # Spread each code into its low bits_per_symbol bits and pack them all at once.
+        symbols = np.asarray(codes, dtype=np.uint8)
+        bits = np.unpackbits(symbols[:, None], axis=1)[:, 8 - bits_per_symbol :]
+        return np.packbits(bits).tobytes()
     buffer = 0
     bits_in_buffer = 0
     output = bytearray()
@@ -421,6 +468,13 @@ def _pack_codes(codes: Sequence[int], bits_per_symbol: int) -> bytes:
 def _unpack_codes(data: bytes, count: int, bits_per_symbol: int) -> list[int]:
     if count == 0:
         return []
+    if count >= _VECTOR_PACK_MIN_CODES:
+        total_bits = count * bits_per_symbol
+        if len(data) * 8 < total_bits:
+            raise EncodingError("Residue stream truncated while unpacking")
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=total_bits)
+        weights = np.left_shift(1, np.arange(bits_per_symbol - 1, -1, -1, dtype=np.int64))
+        return (bits.reshape(count, bits_per_symbol) @ weights).tolist()
     values: list[int] = []
     buffer = 0
     bits_in_buffer = 0
@@ -465,26 +519,13 @@ def _decode_residue_stream(
     else:
         decode_map = model["decode_map"]
         max_len = model["max_code_len"]
-        chars: list[str] = []
-        total_bits = len(encoded) * 8
-        bit_pos = 0
-        for _ in range(deviation_count):
-            current = 0
-            length = 0
-            while True:
-                if bit_pos >= total_bits:
-                    raise DecodingError("Insufficient Huffman bits for residue stream")
-                byte = encoded[bit_pos // 8]
-                bit = (byte >> (7 - (bit_pos % 8))) & 1
-                bit_pos += 1
-                current = (current << 1) | bit
-                length += 1
-                residue = decode_map.get((length, current))
-                if residue is not None:
-                    chars.append(residue)
-                    break
-                if length > max_len:
-                    raise DecodingError("Invalid Huffman code in residue stream")
+        fast_table = model.get("fast_table")
+        if fast_table is None and 0 < max_len <= _FAST_HUFFMAN_MAX_BITS:
+            fast_table = _huffman_fast_table(decode_map, max_len)
+        if fast_table is not None:
+            chars = _decode_huffman_fast(encoded, deviation_count, fast_table, max_len)
+        else:
+            chars = _decode_huffman_bitwise(encoded, deviation_count, decode_map, max_len)
 
     try:
         global_codes = [alphabet_lookup[char] for char in chars]
@@ -493,7 +534,73 @@ def _decode_residue_stream(
     return _pack_codes(global_codes, bits_per_symbol)
 
 
+def _decode_huffman_fast(
+    encoded: bytes,
+    count: int,
+    fast_table: Sequence[tuple[str, int] | None],
+    max_len: int,
+) -> list[str]:
+    total_bits = len(encoded) * 8
+    # Zero padding lets the last codes peek a full max_len bits past the stream end.
+    padded = bytes(encoded) + bytes(-(-max_len // 8))
+    peek_mask = (1 << max_len) - 1
+    chars: list[str] = []
+    buffer = 0
+    bits_in_buffer = 0
+    cursor = 0
+    for _ in range(count):
+        while bits_in_buffer < max_len:
+            buffer = (buffer << 8) | padded[cursor]
+            cursor += 1
+            bits_in_buffer += 8
+        entry = fast_table[(buffer >> (bits_in_buffer - max_len)) & peek_mask]
+        consumed = cursor * 8 - bits_in_buffer
+        if entry is None:
+            if consumed + max_len >= total_bits:
+                raise DecodingError("Insufficient Huffman bits for residue stream")
+            raise DecodingError("Invalid Huffman code in residue stream")
+        residue, length = entry
+        if consumed + length > total_bits:
+            raise DecodingError("Insufficient Huffman bits for residue stream")
+        chars.append(residue)
+        bits_in_buffer -= length
+        buffer &= (1 << bits_in_buffer) - 1
+    return chars
+
+
+def _decode_huffman_bitwise(
+    encoded: bytes,
+    count: int,
+    decode_map: dict[tuple[int, int], str],
+    max_len: int,
+) -> list[str]:
+    chars: list[str] = []
+    total_bits = len(encoded) * 8
+    bit_pos = 0
+    for _ in range(count):
+        current = 0
+        length = 0
+        while True:
+            if bit_pos >= total_bits:
+                raise DecodingError("Insufficient Huffman bits for residue stream")
+            byte = encoded[bit_pos // 8]
+            bit = (byte >> (7 - (bit_pos % 8))) & 1
+            bit_pos += 1
+            current = (current << 1) | bit
+            length += 1
+            residue = decode_map.get((length, current))
+            if residue is not None:
+                chars.append(residue)
+                break
+            if length > max_len:
+                raise DecodingError("Invalid Huffman code in residue stream")
+    return chars
+
+
 def _bit_positions(bitmask: bytes) -> list[int]:
+    if len(bitmask) >= _VECTOR_BITMASK_MIN_BYTES:
+        bits = np.unpackbits(np.frombuffer(bitmask, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits).tolist()
     positions: list[int] = []
     bit_index = 0
     for byte in bitmask:
@@ -530,13 +637,9 @@ def _encode_bitmask(bitmask: bytes, bitmask_bytes: int) -> tuple[int, int, bytes
     raw_payload = trimmed
 
     positions = _bit_positions(bitmask)
-    sparse_buffer = bytearray()
-    prev = -1
-    for pos in positions:
-        delta = pos - prev
-        sparse_buffer.extend(_write_varint(delta))
-        prev = pos
-    sparse_payload = bytes(sparse_buffer)
+    sparse_payload = _write_varints(
+        [pos - prev for prev, pos in zip([-1, *positions], positions)]
+    )
 
     rle_payload = _run_length_encode(trimmed)
 
@@ -741,6 +844,23 @@ def _canonical_code_maps(
     return encode_map, decode_map, max_len
 
 
+def _huffman_fast_table(
+    decode_map: dict[tuple[int, int], str], max_len: int
+) -> list[tuple[str, int] | None]:
+    """Map every *max_len*-bit window to the ``(residue, length)`` its prefix decodes to."""
+
+    table: list[tuple[str, int] | None] = [None] * (1 << max_len)
+    # Fill longest codes first so a shorter prefix wins, as in the bit-by-bit walk.
+    for (length, code), residue in sorted(decode_map.items(), key=lambda item: -item[0][0]):
+        if length > max_len or code >> length:
+            continue
+        start = code << (max_len - length)
+        table[start : start + (1 << (max_len - length))] = [(residue, length)] * (
+            1 << (max_len - length)
+        )
+    return table
+
+
 def _pack_huffman_codes(
     encode_map: dict[str, tuple[int, int]], chars: Sequence[str]
 ) -> bytes:
@@ -3,43 +3,139 @@
 from __future__ import annotations
 
 import base64
+import functools
 import gzip
-import io
 import lzma
 import math
 import os
+import re
+import threading
 import time
 import zlib
-from typing import Any, Iterable, List, Sequence, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence, Tuple
+
+import numpy as np
 
 from .._compat import dataclass, zip_strict
 
 from ..diagnostics.checksums import alignment_checksum
 from ..io import AlignmentFrame, alignment_from_sequences
 from ..config import FORMAT_VERSION
-from .consensus import collect_column_profiles
+from .consensus import ColumnProfile, iter_column_profile_windows
 from .encoding import decode_blocks, encode_blocks
 from .rle import RunLengthBlock, collect_run_length_blocks
 
+# Checksums are skipped because the alignment SHA-256 already guards the round trip.
+_ZSTD_OPTIONS: dict[str, Any] = {
+    "level": 5,
+    "threads": -1,
+    "write_checksum": False,
+    "write_content_size": True,
+}
+# Sequence ID blocks are tiny, so worker-thread start-up would dominate.
+_ZSTD_ID_OPTIONS: dict[str, Any] = {"level": 3}
+
 try:  # pragma: no cover - optional dependency
     import zstandard as zstd
 
-    _ZSTD_COMPRESSOR = zstd.ZstdCompressor(level=5)
+    _ZSTD_COMPRESSOR = zstd.ZstdCompressor(**_ZSTD_OPTIONS)
+    _ZSTD_ID_COMPRESSOR = zstd.ZstdCompressor(**_ZSTD_ID_OPTIONS)
     _ZSTD_DECOMPRESSOR = zstd.ZstdDecompressor()
 except ModuleNotFoundError:  # pragma: no cover - environment without zstd
     zstd = None
     _ZSTD_COMPRESSOR = None
+    _ZSTD_ID_COMPRESSOR = None
     _ZSTD_DECOMPRESSOR = None
 
+# zstd contexts are not safe to share between threads, so worker threads get their own.
+_ZSTD_LOCAL = threading.local()
+
+# Payloads below this size compress faster serially than the pool can be spun up.
+_PARALLEL_CODEC_THRESHOLD = 64 * 1024
+_CPU_COUNT = os.cpu_count() or 1
+# Payloads below this size also try zlib -9 when zstd is available (see _compress_candidates).
+_ZLIB_CANDIDATE_MAX_BYTES = 64 * 1024
+# Alignments with at least this many residues hash their checksum on a spare core.
+_PARALLEL_CHECKSUM_MIN_CELLS = 1 << 20
+# The gzip command-line default. This deliberately lowers Python's gzip.compress default
+# of 9: level 9 is several times slower on near-random FASTA, and fallback archives grow
+# only about 2% at level 6.
+_GZIP_FALLBACK_LEVEL = 6
+
 _SEQ_ID_MAGIC = b"ECID"
 _SEQ_ID_VERSION = 2
+_SEQ_ID_MIN_COMPRESS_BYTES = 32
+_SEQ_ID_MIN_ZSTD_BYTES = 64
+# Varint bytes for every value below 0x80, i.e. the length prefix of nearly every ID.
+_SINGLE_BYTE_VARINTS = tuple(bytes((value,)) for value in range(0x80))
 _SAMPLE_CAP = 256
+# Budget for the (rows, rows, samples) comparison temporary so each tile stays in L2.
+_DISTANCE_TILE_BYTES = 512 * 1024
+# Bitmask cells (blocks x sequences) unpacked per decode pass, bounding temporaries.
+_DECODE_CHUNK_CELLS = 1 << 18
+# Residue cells (sequences x columns) profiled per window while encoding.
+_PROFILE_WINDOW_CELLS = 1 << 22
 
 
 _PERM_MAGIC = b"ECPE"
 _PERM_VERSION = 1
 _WIDTH_TO_CODE = {1: 0, 2: 1, 4: 2}
 _CODE_TO_WIDTH = {value: key for key, value in _WIDTH_TO_CODE.items()}
+# Explicitly little-endian so chunks are portable across host byte orders.
+_WIDTH_TO_DTYPE = {1: np.dtype("<u1"), 2: np.dtype("<u2"), 4: np.dtype("<u4")}
+
+
+def _zstd_compressor(*, for_ids: bool = False):
+    """Return a zstd compressor owned by the calling thread."""
+
+    shared = _ZSTD_ID_COMPRESSOR if for_ids else _ZSTD_COMPRESSOR
+    if shared is None:
+        return None
+    if threading.current_thread() is threading.main_thread():
+        return shared
+    attribute = "id_compressor" if for_ids else "compressor"
+    compressor = getattr(_ZSTD_LOCAL, attribute, None)
+    if compressor is None:
+        compressor = zstd.ZstdCompressor(**(_ZSTD_ID_OPTIONS if for_ids else _ZSTD_OPTIONS))
+        setattr(_ZSTD_LOCAL, attribute, compressor)
+    return compressor
+
+
+def _run_codec(label: str, codec, data: bytes) -> tuple[str, bytes, float]:
+    start = time.perf_counter()
+    encoded = codec(data)
+    return label, encoded, time.perf_counter() - start
+
+
+def _compress_candidates(raw_payload: bytes) -> list[tuple[str, bytes, float]]:
+    """Encode *raw_payload* with each candidate codec.
+
+    zstd, zlib and lzma all release the GIL while compressing, so large payloads are
+    dispatched to a thread pool and the wall time approaches that of the slowest codec.
+    """
+
+    codecs: list[tuple[str, Any]] = []
+    if _ZSTD_COMPRESSOR is not None:
+        codecs.append(("zstd", lambda data: _zstd_compressor().compress(data)))
+    # zlib's smaller framing often wins on small payloads, where it is also cheap; on
+    # large ones zstd usually matches its ratio in a fraction of the time, so zlib -9
+    # only runs there when zstandard is missing.
+    if _ZSTD_COMPRESSOR is None or len(raw_payload) < _ZLIB_CANDIDATE_MAX_BYTES:
+        codecs.append(("zlib", lambda data: zlib.compress(data, level=9)))
+    codecs.append(("xz", lambda data: lzma.compress(data, preset=6)))
+
+    candidates: list[tuple[str, bytes, float]] = [("raw", raw_payload, 0.0)]
+    if len(raw_payload) < _PARALLEL_CODEC_THRESHOLD:
+        candidates.extend(_run_codec(label, codec, raw_payload) for label, codec in codecs)
+        return candidates
+
+    with ThreadPoolExecutor(max_workers=len(codecs)) as executor:
+        futures = [
+            executor.submit(_run_codec, label, codec, raw_payload) for label, codec in codecs
+        ]
+        candidates.extend(future.result() for future in futures)
+    return candidates
 
 
 def _build_permutation_chunk(
@@ -60,16 +156,14 @@ def _build_permutation_chunk(
         width = 4
     width_code = _WIDTH_TO_CODE[width]
 
-    raw = bytearray()
-    for value in permutation:
-        raw.extend(int(value).to_bytes(width, "little", signed=False))
+    raw = np.asarray(permutation, dtype=_WIDTH_TO_DTYPE[width]).tobytes()
 
-    compressed = zlib.compress(bytes(raw), level=9)
+    compressed = zlib.compress(raw, level=9)
     if len(compressed) + 8 < len(raw):
         payload = compressed
         compression_flag = 1
     else:
-        payload = bytes(raw)
+        payload = raw
         compression_flag = 0
 
     chunk = bytearray()
@@ -129,10 +223,7 @@ def _extract_permutation_chunk(
     if len(payload) != size * width:
         raise ValueError("Permutation payload size mismatch")
 
-    permutation = [
-        int.from_bytes(payload[i : i + width], "little", signed=False)
-        for i in range(0, len(payload), width)
-    ]
+    permutation = np.frombuffer(payload, dtype=_WIDTH_TO_DTYPE[width]).tolist()
 
     return payload_data[length:], permutation
 
@@ -271,6 +362,11 @@ def _should_use_tree(stats: dict[str, float] | None) -> bool:
 def _encode_varint(value: int) -> bytes:
     if value < 0:
         raise ValueError("varint cannot encode negative values")
+    # One- and two-byte encodings cover nearly every length and count written.
+    if value < 0x80:
+        return bytes((value,))
+    if value < 0x4000:
+        return bytes(((value & 0x7F) | 0x80, value >> 7))
     out = bytearray()
     while True:
         byte = value & 0x7F
@@ -284,6 +380,9 @@ def _encode_varint(value: int) -> bytes:
 
 
 def _decode_varint(buffer: memoryview, cursor: int) -> tuple[int, int]:
+    # Single-byte values skip the accumulate loop.
+    if cursor < len(buffer) and buffer[cursor] < 0x80:
+        return buffer[cursor], cursor + 1
     shift = 0
     result = 0
     while True:
@@ -301,24 +400,27 @@ def _decode_varint(buffer: memoryview, cursor: int) -> tuple[int, int]:
 
 def _encode_sequence_ids(ids: Iterable[str]) -> bytes:
     names = [name.encode("utf-8") for name in ids]
-    plain = bytearray()
-    plain.extend(_encode_varint(len(names)))
-    for name_bytes in names:
-        plain.extend(_encode_varint(len(name_bytes)))
-        plain.extend(name_bytes)
+    lengths = list(map(len, names))
+    # Interleave length prefixes and names in one list so a single join copies them.
+    parts = [b""] * (2 * len(names) + 1)
+    parts[0] = _encode_varint(len(names))
+    if max(lengths, default=0) < 0x80:
+        parts[1::2] = map(_SINGLE_BYTE_VARINTS.__getitem__, lengths)
+    else:
+        parts[1::2] = map(_encode_varint, lengths)
+    parts[2::2] = names
 
     mode = 0
-    payload_bytes = bytes(plain)
+    payload_bytes = b"".join(parts)
 
-    if _ZSTD_COMPRESSOR is not None:
-        compressed = _ZSTD_COMPRESSOR.compress(payload_bytes)
+    # Tiny blocks never shrink once frame headers are added, so ship them raw.
+    if _ZSTD_ID_COMPRESSOR is not None and len(payload_bytes) >= _SEQ_ID_MIN_ZSTD_BYTES:
+        compressed = _zstd_compressor(for_ids=True).compress(payload_bytes)
         if len(compressed) + 1 < len(payload_bytes):
             mode = 1
             payload_bytes = compressed
-    else:
-        compressed = None
 
-    if mode == 0:
+    if mode == 0 and len(payload_bytes) >= _SEQ_ID_MIN_COMPRESS_BYTES:
         zlib_compressed = zlib.compress(payload_bytes, level=9)
         if len(zlib_compressed) + 1 < len(payload_bytes):
             mode = 2
@@ -412,46 +514,62 @@ def _select_sample_indices(length: int, cap: int = _SAMPLE_CAP) -> list[int]:
     return indices
 
 
-def _build_distance_matrix(sequences: list[str], sample_indices: list[int]) -> list[list[int]]:
-    num_sequences = len(sequences)
-    matrix = [[0] * num_sequences for _ in range(num_sequences)]
-    if not sample_indices:
+def _sample_columns(sequences: Sequence[str], sample_indices: Sequence[int]) -> np.ndarray:
+    """Return the sampled columns of *sequences* as an ``(N, S)`` code matrix."""
+
+    if not sequences or not len(sample_indices):
+        return np.zeros((len(sequences), 0), dtype=np.uint8)
+    columns = np.asarray(sample_indices, dtype=np.intp)
+    try:
+        rows = [np.frombuffer(seq.encode("latin-1"), dtype=np.uint8)[columns] for seq in sequences]
+    except UnicodeEncodeError:
+        rows = [np.frombuffer(seq.encode("utf-32-le"), dtype="<u4")[columns] for seq in sequences]
+    return np.vstack(rows)
+
+
+def _pairwise_mismatches(samples: np.ndarray) -> np.ndarray:
+    """Count mismatching sampled columns for every pair of rows in *samples*.
+
+    Rows are compared tile by tile so the broadcast temporary never exceeds
+    ``_DISTANCE_TILE_BYTES`` instead of materialising the full ``(N, N, S)`` array.
+    """
+
+    num_sequences, width = samples.shape
+    matrix = np.zeros((num_sequences, num_sequences), dtype=np.int32)
+    if num_sequences == 0 or width == 0:
         return matrix
-    for i in range(num_sequences):
-        seq_i = sequences[i]
-        for j in range(i + 1, num_sequences):
-            seq_j = sequences[j]
-            mismatches = 0
-            for idx in sample_indices:
-                if seq_i[idx] != seq_j[idx]:
-                    mismatches += 1
-            matrix[i][j] = mismatches
-            matrix[j][i] = mismatches
+    tile = max(1, math.isqrt(_DISTANCE_TILE_BYTES // width))
+    for i_start in range(0, num_sequences, tile):
+        i_stop = min(i_start + tile, num_sequences)
+        rows_i = samples[i_start:i_stop, None, :]
+        for j_start in range(i_start, num_sequences, tile):
+            j_stop = min(j_start + tile, num_sequences)
+            mismatches = (rows_i != samples[None, j_start:j_stop, :]).sum(
+                axis=2, dtype=np.int32
+            )
+            matrix[i_start:i_stop, j_start:j_stop] = mismatches
+            matrix[j_start:j_stop, i_start:i_stop] = mismatches.T
     return matrix
 
 
-def _mst_sequence_order(dist_matrix: list[list[int]]) -> list[int]:
-    num_sequences = len(dist_matrix)
+def _mst_sequence_order(dist_matrix: np.ndarray | list[list[int]]) -> list[int]:
+    dist = np.asarray(dist_matrix)
+    num_sequences = dist.shape[0] if dist.ndim == 2 else 0
     if num_sequences == 0:
         return []
-    visited = [False] * num_sequences
-    key = [float("inf")] * num_sequences
-    parent = [-1] * num_sequences
+    visited = np.zeros(num_sequences, dtype=bool)
+    key = np.full(num_sequences, np.inf)
+    parent = np.full(num_sequences, -1, dtype=np.intp)
     key[0] = 0
     for _ in range(num_sequences):
-        candidates = [idx for idx in range(num_sequences) if not visited[idx]]
-        u = min(candidates, key=lambda idx: key[idx])
+        u = int(np.where(visited, np.inf, key).argmin())
         visited[u] = True
-        for v in range(num_sequences):
-            if visited[v] or v == u:
-                continue
-            dist = dist_matrix[u][v]
-            if dist < key[v]:
-                key[v] = dist
-                parent[v] = u
+        closer = ~visited & (dist[u] < key)
+        key[closer] = dist[u][closer]
+        parent[closer] = u
 
     adjacency: list[list[int]] = [[] for _ in range(num_sequences)]
-    for child, par in enumerate(parent):
+    for child, par in enumerate(parent.tolist()):
         if par >= 0:
             adjacency[par].append(child)
 
@@ -460,38 +578,40 @@ def _mst_sequence_order(dist_matrix: list[list[int]]) -> list[int]:
     while stack:
         node = stack.pop()
         order.append(node)
-        children = sorted(adjacency[node], key=lambda idx: dist_matrix[node][idx], reverse=True)
+        row = dist[node].tolist()
+        children = sorted(adjacency[node], key=lambda idx: row[idx], reverse=True)
         stack.extend(children)
     return order
 
 
-def _greedy_sequence_order(dist_matrix: list[list[int]]) -> list[int]:
-    num_sequences = len(dist_matrix)
+def _greedy_sequence_order(dist_matrix: np.ndarray | list[list[int]]) -> list[int]:
+    dist = np.asarray(dist_matrix)
+    num_sequences = dist.shape[0] if dist.ndim == 2 else 0
     if num_sequences == 0:
         return []
-    remaining = set(range(num_sequences))
-    start = min(remaining, key=lambda idx: sum(dist_matrix[idx]))
+    unreachable = np.iinfo(dist.dtype).max
+    active = np.ones(num_sequences, dtype=bool)
+    # argmin returns the first minimum, matching the lowest-index tie-break of min().
+    start = int(dist.sum(axis=1).argmin())
     order = [start]
-    remaining.remove(start)
+    active[start] = False
     current = start
-    while remaining:
-        next_node = min(remaining, key=lambda idx: dist_matrix[current][idx])
+    for _ in range(num_sequences - 1):
+        next_node = int(np.where(active, dist[current], unreachable).argmin())
         order.append(next_node)
-        remaining.remove(next_node)
+        active[next_node] = False
         current = next_node
     return order
 
 
-def _order_cost(order: list[int], dist_matrix: list[list[int]]) -> int:
+def _order_cost(order: list[int], dist_matrix: np.ndarray | list[list[int]]) -> int:
     if len(order) <= 1:
         return 0
-    cost = 0
-    for i in range(1, len(order)):
-        cost += dist_matrix[order[i - 1]][order[i]]
-    return cost
+    dist = np.asarray(dist_matrix)
+    return int(dist[order[:-1], order[1:]].sum())
 
 
-def _choose_order(dist_matrix: list[list[int]], candidates: list[tuple[str, list[int]]]) -> tuple[list[int], str]:
+def _choose_order(dist_matrix: np.ndarray, candidates: list[tuple[str, list[int]]]) -> tuple[list[int], str]:
     env = os.environ.get("ECOMP_SEQUENCE_ORDER", "auto").lower()
     unique: dict[tuple[int, ...], tuple[str, list[int]]] = {}
     ordered_keys: list[tuple[int, ...]] = []
@@ -552,29 +672,17 @@ def _tree_guided_order(frame: AlignmentFrame) -> list[int] | None:
     order: list[int] = []
     seen: set[int] = set()
 
-    def traverse(node) -> bool:
-        children = getattr(node, "children", None)
-        if children:
-            for child in children:
-                if not traverse(child):
-                    return False
-            return True
-
-        label = getattr(node, "label", None)
-        if not isinstance(label, str):
-            return False
-        try:
-            index = id_to_index[label]
-        except KeyError:
-            return False
-        if index in seen:
-            return False
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        if node.children:
+            pending.extend(reversed(node.children))
+            continue
+        index = id_to_index.get(node.label) if isinstance(node.label, str) else None
+        if index is None or index in seen:
+            return None
         seen.add(index)
         order.append(index)
-        return True
-
-    if not traverse(root):
-        return None
 
     if len(order) != frame.num_sequences:
         return None
@@ -585,64 +693,82 @@ def _tree_guided_order(frame: AlignmentFrame) -> list[int] | None:
     return order
 
 
-def _parse_newick(newick: str):
+_NEWICK_TOKEN = re.compile(r"[(),;]|:[^(),;]*|[^(),:;]+")
+_NEWICK_DELIMITERS = {",", ")", ";"}
+
+
+class _NewickNode(NamedTuple):
+    label: str | None
+    children: list[_NewickNode]
+
+
+def _parse_newick(newick: str) -> _NewickNode:
+    """Parse *newick* into a node tree, ignoring branch lengths.
+
+    Tokens drive an explicit stack of open groups, so deep or wide trees do not run
+    into the interpreter recursion limit.
+    """
+
     text = newick.strip()
     if not text.endswith(";"):
         raise ValueError("Newick string must end with ';'")
-    idx = 0
-
-    class _Node:
-        __slots__ = ("label", "children")
-
-        def __init__(self, label=None, children=None):
-            self.label = label
-            self.children = children or []
-
-    def parse_subtree():
-        nonlocal idx
-        if idx >= len(text):
-            raise ValueError("Unexpected end of Newick string")
-        if text[idx] == "(":
-            idx += 1
-            children: list[_Node] = []
-            while True:
-                children.append(parse_subtree())
-                if text[idx] == ",":
-                    idx += 1
-                    continue
-                if text[idx] == ")":
-                    idx += 1
-                    break
-                raise ValueError("Malformed Newick: expected ',' or ')' ")
-            label, _ = parse_label_length()
-            return _Node(label=label, children=children)
-        label, _ = parse_label_length()
-        return _Node(label=label, children=[])
-
-    def parse_label_length():
-        nonlocal idx
-        label_chars: list[str] = []
-        while idx < len(text) and text[idx] not in ":,);":
-            label_chars.append(text[idx])
-            idx += 1
-        label = "".join(label_chars) or None
-        if idx < len(text) and text[idx] == ":":
-            idx += 1
-            while idx < len(text) and text[idx] not in ",);":
-                idx += 1
-        return label, None
-
-    root = parse_subtree()
-    if idx >= len(text) or text[idx] != ";":
-        raise ValueError("Unexpected content after Newick tree")
-    return root
-
-
-def _compute_similarity_order(frame: AlignmentFrame) -> tuple[AlignmentFrame, list[int], str]:
+
+    groups: list[list[_NewickNode]] = [[]]
+    closed: list[_NewickNode] | None = None  # children of a group awaiting its label
+    expect_node = True
+    finished = False
+    for match in _NEWICK_TOKEN.finditer(text):
+        token = match.group()
+        if finished:
+            raise ValueError("Unexpected content after Newick tree")
+        if token[0] == ":":
+            continue
+        if token == "(":
+            if not expect_node:
+                raise ValueError("Malformed Newick: unexpected '('")
+            groups.append([])
+            continue
+        if token in _NEWICK_DELIMITERS:
+            if closed is not None:
+                groups[-1].append(_NewickNode(None, closed))
+                closed = None
+            elif expect_node:
+                groups[-1].append(_NewickNode(None, []))
+            if token == ",":
+                if len(groups) == 1:
+                    raise ValueError("Malformed Newick: expected ';'")
+                expect_node = True
+            elif token == ")":
+                if len(groups) == 1:
+                    raise ValueError("Malformed Newick: unbalanced ')'")
+                closed = groups.pop()
+                expect_node = False
+            else:
+                if len(groups) != 1:
+                    raise ValueError("Malformed Newick: expected ',' or ')'")
+                finished = True
+            continue
+        if closed is not None:
+            groups[-1].append(_NewickNode(token, closed))
+            closed = None
+        elif expect_node:
+            groups[-1].append(_NewickNode(token, []))
+        else:
+            raise ValueError(f"Malformed Newick: unexpected label {token!r}")
+        expect_node = False
+
+    if len(groups[0]) != 1:
+        raise ValueError("Malformed Newick: expected a single root")
+    return groups[0][0]
+
+
+def _select_sequence_order(frame: AlignmentFrame) -> tuple[list[int], str]:
+    """Choose the sequence order used for encoding without reordering *frame*."""
+
     num_sequences = frame.num_sequences
     baseline_order = list(range(num_sequences))
     if num_sequences <= 2:
-        return frame, baseline_order, "baseline"
+        return baseline_order, "baseline"
 
     stats = _compute_alignment_stats(frame)
 
@@ -651,22 +777,19 @@ def _compute_similarity_order(frame: AlignmentFrame) -> tuple[AlignmentFrame, li
         tree_order = _tree_guided_order(frame)
 
     if tree_order is not None:
-        if tree_order == baseline_order:
-            return frame, tree_order, "tree"
-        reordered = alignment_from_sequences(
-            ids=[frame.ids[idx] for idx in tree_order],
-            sequences=[frame.sequences[idx] for idx in tree_order],
-            alphabet=frame.alphabet,
-            metadata=dict(frame.metadata),
-        )
-        return reordered, tree_order, "tree"
+        return tree_order, "tree"
 
     length = frame.alignment_length
     if length == 0:
-        return frame, baseline_order, "baseline"
+        return baseline_order, "baseline"
 
     sample_indices = _select_sample_indices(length)
-    dist_matrix = _build_distance_matrix(frame.sequences, sample_indices)
+    matrix = frame.residue_matrix()
+    if matrix is not None:
+        samples = matrix[:, np.asarray(sample_indices, dtype=np.intp)]
+    else:
+        samples = _sample_columns(frame.sequences, sample_indices)
+    dist_matrix = _pairwise_mismatches(samples)
 
     candidates = [
         ("baseline", baseline_order),
@@ -674,17 +797,7 @@ def _compute_similarity_order(frame: AlignmentFrame) -> tuple[AlignmentFrame, li
         ("greedy", _greedy_sequence_order(dist_matrix)),
     ]
 
-    best_order, label = _choose_order(dist_matrix, candidates)
-    if best_order == baseline_order:
-        return frame, best_order, label
-
-    reordered = alignment_from_sequences(
-        ids=[frame.ids[idx] for idx in best_order],
-        sequences=[frame.sequences[idx] for idx in best_order],
-        alphabet=frame.alphabet,
-        metadata=dict(frame.metadata),
-    )
-    return reordered, best_order, label
+    return _choose_order(dist_matrix, candidates)
 
 
 @dataclass(slots=True)
@@ -695,57 +808,111 @@ class CompressedAlignment:
     metadata: dict[str, Any]
 
 
-def compress_alignment(frame: AlignmentFrame) -> CompressedAlignment:
-    """Compress an alignment into a binary payload and structured metadata."""
+def _encode_alignment_streaming(
+    frame: AlignmentFrame,
+    permutation: Sequence[int] | None,
+    bits_per_symbol: int,
+) -> tuple[bytes, dict[str, int]]:
+    """Profile, run-length encode and serialise the columns of *frame*.
+
+    Columns are profiled a window at a time and fed straight into run-length grouping,
+    so no list of column profiles is materialised. The encoder still needs every block
+    before it can write its residue models, so the (much shorter) block list is kept.
+    Returns the block stream and the block statistics recorded in the metadata.
+    """
+
+    symbol_lookup = {symbol: index for index, symbol in enumerate(frame.alphabet)}
+    window = max(1, _PROFILE_WINDOW_CELLS // frame.num_sequences)
+    deviation_columns = 0
+
+    def counted_profiles() -> Iterator[ColumnProfile]:
+        nonlocal deviation_columns
+        for profile in iter_column_profile_windows(frame, permutation, window=window):
+            if profile.deviations:
+                deviation_columns += 1
+            yield profile
+
+    blocks = collect_run_length_blocks(
+        counted_profiles(), frame.num_sequences, symbol_lookup, bits_per_symbol
+    )
+    payload = encode_blocks(
+        blocks, (frame.num_sequences + 7) // 8, bits_per_symbol, frame.alphabet
+    )
+    stats = {
+        "run_length_blocks": len(blocks),
+        "max_run_length": max((block.run_length for block in blocks), default=0),
+        "columns_with_deviations": deviation_columns,
+    }
+    return payload, stats
 
-    original_frame = frame
-    frame, permutation, order_label = _compute_similarity_order(frame)
-    permutation_changed = permutation != list(range(frame.num_sequences))
 
-    checksum_value = alignment_checksum(original_frame.sequences)
+def compress_alignment(
+    frame: AlignmentFrame, *, checksum_mode: str = "full"
+) -> CompressedAlignment:
+    """Compress an alignment into a binary payload and structured metadata.
 
-    column_profiles = collect_column_profiles(frame)
-    alphabet = frame.alphabet
-    symbol_lookup = {symbol: index for index, symbol in enumerate(alphabet)}
-    bits_per_symbol = max(1, math.ceil(math.log2(max(len(alphabet), 1))))
+    *checksum_mode* selects how the round-trip SHA-256 is computed (see
+    :func:`~ecomp.diagnostics.checksums.alignment_checksum`); non-default modes are
+    recorded in the metadata so readers verify with the same scheme.
+    """
 
-    run_length_blocks = collect_run_length_blocks(
-        column_profiles, frame.num_sequences, symbol_lookup, bits_per_symbol
-    )
-    bitmask_bytes = (frame.num_sequences + 7) // 8
-    run_length_payload = encode_blocks(
-        run_length_blocks, bitmask_bytes, bits_per_symbol, frame.alphabet
-    )
-    seq_id_block = _encode_sequence_ids(frame.ids)
-    raw_payload = seq_id_block + run_length_payload
-    perm_chunk: bytes | None = None
-    perm_meta: dict[str, Any] | None = None
-    if permutation_changed:
-        perm_chunk, perm_meta = _build_permutation_chunk(permutation)
-        if perm_chunk:
-            raw_payload = perm_chunk + raw_payload
-
-    payload_candidates: list[tuple[str, bytes, float]] = [("raw", raw_payload, 0.0)]
-    # Try zstandard first; its ratio is typically better than zlib for genomic data.
-    if _ZSTD_COMPRESSOR is not None:
-        zstd_start = time.perf_counter()
-        zstd_payload = _ZSTD_COMPRESSOR.compress(raw_payload)
-        zstd_seconds = time.perf_counter() - zstd_start
-        payload_candidates.append(("zstd", zstd_payload, zstd_seconds))
-
-    zlib_start = time.perf_counter()
-    zlib_payload = zlib.compress(raw_payload, level=9)
-    zlib_seconds = time.perf_counter() - zlib_start
-    payload_candidates.append(("zlib", zlib_payload, zlib_seconds))
-
-    lzma_start = time.perf_counter()
-    lzma_payload = lzma.compress(raw_payload, preset=6)
-    lzma_seconds = time.perf_counter() - lzma_start
-    payload_candidates.append(("xz", lzma_payload, lzma_seconds))
-
-    payload_encoding, payload_bytes, _ = min(payload_candidates, key=lambda item: len(item[1]))
-    max_run_length = max((block.run_length for block in run_length_blocks), default=0)
-    deviation_columns = sum(1 for block in column_profiles if block.deviations)
+    # Sequences are read through the permutation rather than copied into a reordered frame.
+    permutation, order_label = _select_sequence_order(frame)
+    permutation_changed = permutation != list(range(frame.num_sequences))
+
+    checksum_pool: ThreadPoolExecutor | None = None
+    checksum_job: Future[str] | None = None
+    if _CPU_COUNT > 1 and (
+        frame.num_sequences * frame.alignment_length >= _PARALLEL_CHECKSUM_MIN_CELLS
+    ):
+        # hashlib releases the GIL on large buffers, so the digest overlaps the encode.
+        checksum_pool = ThreadPoolExecutor(max_workers=1)
+        checksum_job = checksum_pool.submit(
+            alignment_checksum, frame.sequences, mode=checksum_mode
+        )
+        checksum_value = None
+    else:
+        checksum_value = alignment_checksum(frame.sequences, mode=checksum_mode)
+
+    try:
+        bits_per_symbol = max(1, math.ceil(math.log2(max(len(frame.alphabet), 1))))
+        bitmask_bytes = (frame.num_sequences + 7) // 8
+        run_length_payload, block_stats = _encode_alignment_streaming(
+            frame, permutation if permutation_changed else None, bits_per_symbol
+        )
+        ordered_ids = (
+            [frame.ids[idx] for idx in permutation] if permutation_changed else frame.ids
+        )
+        payload_parts = [_encode_sequence_ids(ordered_ids), run_length_payload]
+        perm_chunk: bytes | None = None
+        perm_meta: dict[str, Any] | None = None
+        if permutation_changed:
+            perm_chunk, perm_meta = _build_permutation_chunk(permutation)
+            if perm_chunk:
+                payload_parts.insert(0, perm_chunk)
+        # Join once so the block stream is copied a single time, then drop the parts.
+        raw_payload = b"".join(payload_parts)
+        del payload_parts, run_length_payload
+
+        fallback_job: Future[tuple[bytes, bytes]] | None = None
+        if _CPU_COUNT > 1 and len(raw_payload) >= _PARALLEL_CODEC_THRESHOLD:
+            # Every payload is compared with the gzip fallback, so gzip the FASTA on a
+            # spare core while the payload codecs run. Leaving the pool joins the job, so
+            # it never outlives this call, even when a codec raises.
+            with ThreadPoolExecutor(max_workers=1) as fallback_pool:
+                fallback_job = fallback_pool.submit(_gzip_fasta, frame)
+                payload_candidates = _compress_candidates(raw_payload)
+        else:
+            payload_candidates = _compress_candidates(raw_payload)
+        payload_encoding, payload_bytes, _ = min(
+            payload_candidates, key=lambda item: len(item[1])
+        )
+        if checksum_job is not None:
+            checksum_value = checksum_job.result()
+    finally:
+        # Join the digest even when the encode raises, so it never outlives this call.
+        if checksum_pool is not None:
+            checksum_pool.shutdown(wait=True)
     metadata = {
         "format_version": FORMAT_VERSION,
         "codec": "ecomp",
@@ -754,9 +921,7 @@ def compress_alignment(frame: AlignmentFrame) -> CompressedAlignment:
         "alphabet": frame.alphabet,
         "source_format": frame.metadata.get("source_format", "unknown"),
         "checksum_sha256": checksum_value,
-        "run_length_blocks": len(run_length_blocks),
-        "max_run_length": max_run_length,
-        "columns_with_deviations": deviation_columns,
+        **block_stats,
         "bitmask_bytes": bitmask_bytes,
         "bits_per_symbol": bits_per_symbol,
         "payload_encoding": payload_encoding,
@@ -765,11 +930,13 @@ def compress_alignment(frame: AlignmentFrame) -> CompressedAlignment:
         "sequence_id_codec": "inline",
         "ordering_strategy": order_label,
     }
+    if checksum_mode != "full":
+        metadata["checksum_mode"] = checksum_mode
     if perm_meta:
         metadata["sequence_permutation"] = perm_meta
     metadata.pop("sequence_ids", None)
     payload_bytes, metadata = _maybe_use_gzip_fallback(
-        original_frame, payload_bytes, metadata
+        frame, payload_bytes, metadata, pending=fallback_job
     )
     return CompressedAlignment(payload=payload_bytes, metadata=metadata)
 
@@ -838,41 +1005,57 @@ def decompress_alignment(payload: bytes, metadata: dict[str, Any]) -> AlignmentF
             "Metadata sequence count does not match sequence IDs provided"
         )
 
-    blocks = decode_blocks(payload_data, bitmask_bytes, bits_per_symbol, alphabet)
-    sequences = [["" for _ in range(expected_columns)] for _ in range(num_sequences)]
-
     try:
-        symbol_table = list(alphabet)
+        symbol_table = tuple(alphabet)
     except TypeError as exc:  # pragma: no cover - guard against malformed metadata
         raise ValueError("Alphabet metadata is not iterable") from exc
 
-    column_index = 0
-    for block in blocks:
-        consensus = block.consensus
-        for _ in range(block.run_length):
-            if column_index >= expected_columns:
-                raise ValueError(
-                    "Decoded columns exceed expected alignment length"
-                )
-            residue_indices = _iter_deviation_indices(block.bitmask, num_sequences)
-            residues = _decode_residues(
-                block.residues,
-                len(residue_indices),
-                bits_per_symbol,
-                symbol_table,
-            )
-            for seq_list in sequences:
-                seq_list[column_index] = consensus
-            for seq_index, residue in zip_strict(residue_indices, residues):
-                sequences[seq_index][column_index] = residue
-            column_index += 1
-
-    if column_index != expected_columns:
+    blocks = decode_blocks(payload_data, bitmask_bytes, bits_per_symbol, symbol_table)
+    # Residue codes index straight into the alphabet's ASCII bytes.
+    symbol_bytes = np.frombuffer("".join(symbol_table).encode("ascii"), dtype=np.uint8)
+    if len(symbol_bytes) != len(symbol_table):
+        raise ValueError("Alphabet symbols must be single ASCII characters")
+    # Block fields are gathered into parallel arrays so the consensus of every column
+    # is laid down with one broadcast; only blocks with deviations are visited again.
+    run_lengths = np.fromiter(
+        (block.run_length for block in blocks), dtype=np.intp, count=len(blocks)
+    )
+    consensus_codes = np.frombuffer(
+        "".join(block.consensus for block in blocks).encode("ascii"), dtype=np.uint8
+    )
+    run_ends = np.cumsum(run_lengths)
+    column_count = int(run_ends[-1]) if len(blocks) else 0
+    if column_count > expected_columns:
         raise ValueError(
-            f"Decoded columns ({column_index}) do not match expected length {expected_columns}"
+            "Decoded columns exceed expected alignment length"
+        )
+    if column_count != expected_columns:
+        raise ValueError(
+            f"Decoded columns ({column_count}) do not match expected length {expected_columns}"
+        )
+
+    # Residues are written as ASCII codes into one preallocated row-major buffer.
+    buffer = np.empty((num_sequences, expected_columns), dtype=np.uint8)
+    buffer[:] = np.repeat(consensus_codes, run_lengths)
+
+    chunk = max(1, _DECODE_CHUNK_CELLS // max(num_sequences, 1))
+    for first in range(0, len(blocks), chunk):
+        last = min(first + chunk, len(blocks))
+        _scatter_deviations(
+            buffer,
+            blocks[first:last],
+            run_ends[first:last] - run_lengths[first:last],
+            run_lengths[first:last],
+            bitmask_bytes,
+            bits_per_symbol,
+            symbol_bytes,
         )
 
-    reconstructed = ["".join(row) for row in sequences]
+    # One ASCII decode for the whole buffer; rows are then plain str slices.
+    flat = buffer.tobytes().decode("ascii")
+    reconstructed = [
+        flat[row * expected_columns : (row + 1) * expected_columns] for row in range(num_sequences)
+    ]
 
     permutation = metadata.get("sequence_permutation")
     if permutation:
@@ -890,83 +1073,113 @@ def decompress_alignment(payload: bytes, metadata: dict[str, Any]) -> AlignmentF
     )
 
 
-def _iter_deviation_indices(bitmask: bytes, num_sequences: int) -> List[int]:
-    indices: list[int] = []
-    for seq_index in range(num_sequences):
-        byte_index = seq_index // 8
-        bit_index = seq_index % 8
-        if bitmask[byte_index] & (1 << bit_index):
-            indices.append(seq_index)
-    return indices
+@functools.lru_cache(maxsize=None)
+def _symbol_bit_weights(bits_per_symbol: int) -> np.ndarray:
+    """Place values of a code's bits, most significant first."""
 
+    weights = np.left_shift(1, np.arange(bits_per_symbol - 1, -1, -1, dtype=np.int64))
+    weights.flags.writeable = False
+    return weights
 
-def _decode_residues(
-    data: bytes,
-    count: int,
+
+def _scatter_deviations(
+    buffer: np.ndarray,
+    blocks: Sequence[RunLengthBlock],
+    run_starts: np.ndarray,
+    run_lengths: np.ndarray,
+    bitmask_bytes: int,
     bits_per_symbol: int,
-    alphabet: Iterable[str],
-) -> list[str]:
-    if count == 0:
-        return []
-    mask = (1 << bits_per_symbol) - 1
-    values: list[int] = []
-    buffer = 0
-    bits_in_buffer = 0
-    data_iter = iter(data)
-    while len(values) < count:
-        while bits_in_buffer < bits_per_symbol:
-            try:
-                byte = next(data_iter)
-            except StopIteration as exc:  # pragma: no cover - corruption guard
-                raise ValueError("Insufficient residue data during decode") from exc
-            buffer = (buffer << 8) | byte
-            bits_in_buffer += 8
-        shift = bits_in_buffer - bits_per_symbol
-        value = (buffer >> shift) & mask
-        buffer &= (1 << shift) - 1
-        bits_in_buffer -= bits_per_symbol
-        values.append(value)
-    alphabet_list = list(alphabet)
+    symbol_bytes: np.ndarray,
+) -> None:
+    """Write the deviating residues of *blocks* into *buffer* in one pass.
+
+    Bitmasks and residue streams of every block are unpacked together, so locating
+    deviations, decoding their codes and scattering them across each run are whole-
+    array operations rather than per-block work.
+    """
+
+    num_sequences = buffer.shape[0]
+    masks = b"".join(block.bitmask for block in blocks)
+    if len(masks) != len(blocks) * bitmask_bytes:
+        raise ValueError("Block bitmask length does not match metadata")
+    bits = np.unpackbits(
+        np.frombuffer(masks, dtype=np.uint8).reshape(len(blocks), bitmask_bytes),
+        axis=1,
+        bitorder="little",
+    )[:, :num_sequences]
+    block_index, rows = np.nonzero(bits)
+    if rows.size == 0:
+        return
+
+    # Each block's residue stream starts on a byte boundary of the joined stream.
+    stream = b"".join(block.residues for block in blocks)
+    stream_lengths = np.fromiter(
+        (len(block.residues) for block in blocks), dtype=np.int64, count=len(blocks)
+    )
+    stream_ends = np.cumsum(stream_lengths) * 8
+    counts = np.bincount(block_index, minlength=len(blocks))
+    first_deviation = np.cumsum(counts) - counts
+    position = np.arange(rows.size) - first_deviation[block_index]
+    bit_start = (stream_ends - stream_lengths * 8)[block_index] + position * bits_per_symbol
+    if np.any(bit_start + bits_per_symbol > stream_ends[block_index]):
+        raise ValueError("Insufficient residue data during decode")
+    stream_bits = np.unpackbits(np.frombuffer(stream, dtype=np.uint8))
+    weights = _symbol_bit_weights(bits_per_symbol)
+    codes = stream_bits[bit_start[:, None] + np.arange(bits_per_symbol)] @ weights
     try:
-        return [alphabet_list[value] for value in values]
+        residue_codes = symbol_bytes[codes]
     except IndexError as exc:  # pragma: no cover - corruption guard
         raise ValueError("Residue code exceeds alphabet size") from exc
 
+    # Repeat every deviation across the columns of its run.
+    span = run_lengths[block_index]
+    cell_offset = np.arange(int(span.sum())) - np.repeat(np.cumsum(span) - span, span)
+    columns = np.repeat(run_starts[block_index], span) + cell_offset
+    buffer[np.repeat(rows, span), columns] = np.repeat(residue_codes, span)
+
 
 def _alignment_to_fasta_bytes(frame: AlignmentFrame) -> bytes:
-    buffer = io.StringIO()
+    # Collect references to the existing strings and copy them once in the join.
+    parts: list[str] = []
     for seq_id, sequence in zip_strict(frame.ids, frame.sequences):
-        buffer.write(f">{seq_id}\n{sequence}\n")
-    return buffer.getvalue().encode("utf-8")
+        parts += (">", seq_id, "\n", sequence, "\n")
+    return "".join(parts).encode("utf-8")
 
 
 def _parse_fasta_bytes(data: bytes) -> AlignmentFrame:
     ids: list[str] = []
-    sequences: list[str] = []
-    current_id: str | None = None
-    current_seq: list[str] = []
-    for raw_line in data.decode("utf-8").splitlines():
-        line = raw_line.strip()
+    chunks: list[list[str]] = []
+    current: list[str] | None = None
+    # Sequence lines before the first header are ignored, as are blank lines.
+    for line in map(str.strip, data.decode("utf-8").splitlines()):
         if not line:
             continue
-        if line.startswith(">"):
-            if current_id is not None:
-                sequences.append("".join(current_seq))
-            current_id = line[1:]
-            ids.append(current_id)
-            current_seq = []
-        else:
-            current_seq.append(line)
-    if current_id is not None:
-        sequences.append("".join(current_seq))
+        if line[0] == ">":
+            ids.append(line[1:])
+            current = []
+            chunks.append(current)
+        elif current is not None:
+            current.append(line)
+    sequences = [parts[0] if len(parts) == 1 else "".join(parts) for parts in chunks]
     return alignment_from_sequences(ids=ids, sequences=sequences)
 
 
+def _gzip_fasta(frame: AlignmentFrame) -> tuple[bytes, bytes]:
+    fasta_bytes = _alignment_to_fasta_bytes(frame)
+    return fasta_bytes, gzip.compress(fasta_bytes, compresslevel=_GZIP_FALLBACK_LEVEL)
+
+
 def _maybe_use_gzip_fallback(
-    original_frame: AlignmentFrame, payload: bytes, metadata: dict[str, Any]
+    original_frame: AlignmentFrame,
+    payload: bytes,
+    metadata: dict[str, Any],
+    *,
+    pending: Future[tuple[bytes, bytes]] | None = None,
 ) -> tuple[bytes, dict[str, Any]]:
-    fasta_bytes = _alignment_to_fasta_bytes(original_frame)
-    gzip_payload = gzip.compress(fasta_bytes)
+    if pending is not None:
+        fasta_bytes, gzip_payload = pending.result()
+    else:
+        fasta_bytes, gzip_payload = _gzip_fasta(original_frame)
     if len(gzip_payload) + 1 < len(payload) and len(gzip_payload) < len(fasta_bytes):
         updated = dict(metadata)
         updated.pop("sequence_permutation", None)
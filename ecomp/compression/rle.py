@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+from itertools import chain, islice
+from operator import itemgetter
+
 from .._compat import dataclass
-from typing import Dict, Iterable, Iterator, Tuple
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
+
+import numpy as np
 
 from .consensus import ColumnProfile
 
@@ -20,6 +25,11 @@ class RunLengthBlock:
 
 MAX_RUN_LENGTH = 255
 
+# Columns are signed in batches spanning about this many bitmask cells; batches with
+# fewer deviations than the threshold stay on the per-column Python path.
+_SIGNATURE_BATCH_CELLS = 1 << 22
+_VECTOR_SIGNATURE_MIN_DEVIATIONS = 256
+
 
 def _column_signature(
     column: ColumnProfile,
@@ -42,6 +52,55 @@ def _column_signature(
     return bytes(bitmask), _pack_codes(residues, bits_per_symbol)
 
 
+def _column_signatures(
+    columns: Sequence[ColumnProfile],
+    num_sequences: int,
+    symbol_lookup: Dict[str, int],
+    bits_per_symbol: int,
+) -> list[Tuple[bytes, bytes]]:
+    """Return :func:`_column_signature` for every column of a batch at once."""
+
+    counts = [len(column.deviations) for column in columns]
+    total = sum(counts)
+    if total < _VECTOR_SIGNATURE_MIN_DEVIATIONS or bits_per_symbol > 8:
+        return [
+            _column_signature(column, num_sequences, symbol_lookup, bits_per_symbol)
+            for column in columns
+        ]
+
+    pairs = list(chain.from_iterable([column.deviations for column in columns]))
+    indices = np.fromiter(map(itemgetter(0), pairs), dtype=np.intp, count=total)
+    try:
+        codes = np.fromiter(
+            map(symbol_lookup.__getitem__, map(itemgetter(1), pairs)), dtype=np.uint8, count=total
+        )
+    except KeyError as exc:
+        raise ValueError(f"Residue {exc.args[0]!r} not present in alphabet mapping") from exc
+
+    bitmask_length = (num_sequences + 7) // 8
+    flags = np.zeros((len(columns), bitmask_length * 8), dtype=bool)
+    flags[np.repeat(np.arange(len(columns)), counts), indices] = True
+    masks = np.packbits(flags, axis=1, bitorder="little").tobytes()
+
+    # Each column's codes form their own MSB-first stream padded to a whole byte.
+    code_counts = np.asarray(counts, dtype=np.intp)
+    stream_bytes = (code_counts * bits_per_symbol + 7) // 8
+    byte_bounds = np.concatenate(([0], np.cumsum(stream_bytes)))
+    first_code = np.cumsum(code_counts) - code_counts
+    starts = np.repeat(byte_bounds[:-1] * 8 - first_code * bits_per_symbol, counts)
+    positions = starts + np.arange(total) * bits_per_symbol
+    code_bits = np.unpackbits(codes[:, None], axis=1)[:, 8 - bits_per_symbol :]
+    stream = np.zeros(int(byte_bounds[-1]) * 8, dtype=np.uint8)
+    stream[positions[:, None] + np.arange(bits_per_symbol)] = code_bits
+    packed = np.packbits(stream).tobytes()
+
+    bounds = byte_bounds.tolist()
+    return [
+        (masks[row * bitmask_length : (row + 1) * bitmask_length], packed[start:end])
+        for row, (start, end) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
 def _pack_codes(codes: Iterable[int], bits_per_symbol: int) -> bytes:
     buffer = 0
     bits_in_buffer = 0
@@ -69,10 +128,9 @@ def iter_run_length_blocks(
     previous_key: tuple[str, bytes, bytes] | None = None
     run_length = 0
     previous_payload: tuple[str, bytes, bytes] | None = None
-    for column in columns:
-        bitmask, residues = _column_signature(
-            column, num_sequences, symbol_lookup, bits_per_symbol
-        )
+    for column, (bitmask, residues) in _iter_signed_columns(
+        columns, num_sequences, symbol_lookup, bits_per_symbol
+    ):
         key = (column.consensus, bitmask, residues)
         if key == previous_key and run_length < MAX_RUN_LENGTH:
             run_length += 1
@@ -98,6 +156,23 @@ def iter_run_length_blocks(
         )
 
 
+def _iter_signed_columns(
+    columns: Iterable[ColumnProfile],
+    num_sequences: int,
+    symbol_lookup: Dict[str, int],
+    bits_per_symbol: int,
+) -> Iterator[tuple[ColumnProfile, Tuple[bytes, bytes]]]:
+    iterator = iter(columns)
+    batch_size = max(1, _SIGNATURE_BATCH_CELLS // max(num_sequences, 1))
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield from zip(
+            batch, _column_signatures(batch, num_sequences, symbol_lookup, bits_per_symbol)
+        )
+
+
 def collect_run_length_blocks(
     columns: Iterable[ColumnProfile],
     num_sequences: int,
@@ -7,11 +7,17 @@ from collections import Counter
 from dataclasses import dataclass
 from typing import Iterable, Sequence
 
+import numpy as np
+
 from .._compat import zip_strict
 from ..io import AlignmentFrame
 
 DEFAULT_GAP_CHARACTERS = {"-"}
 
+# Residues per indicator tile when counting pairwise matches with matrix products;
+# float32 products stay exact while a tile spans fewer than 2**24 columns.
+_PAIRWISE_TILE_CELLS = 1 << 22
+
 _IUPAC_NUCLEOTIDE_CODES = {
     frozenset({"A"}): "A",
     frozenset({"C"}): "C",
@@ -48,16 +54,31 @@ def column_base_counts(
     """Return per-column residue counts.
 
     ``include_gaps`` controls whether the returned tallies contain gap symbols.
-    When ``False`` (default) the counts only reflect non-gap residues.
+    When ``False`` (default) the counts only reflect non-gap residues. Each tally
+    lists its residues in code point order.
     """
 
     gap_chars = set(gap_characters or DEFAULT_GAP_CHARACTERS)
+    residues = frame.residue_matrix()
+    if residues is not None:
+        valid = (
+            np.ones(residues.shape, dtype=bool)
+            if include_gaps
+            else _non_gap_mask(residues, gap_chars)
+        )
+        symbols, symbol_counts = _column_residue_counts(residues, valid)
+        return [
+            Counter({symbol: count for symbol, count in zip(symbols, column) if count})
+            for column in symbol_counts.T.tolist()
+        ]
     counts: list[Counter[str]] = []
     for column in zip_strict(*frame.sequences):
         if include_gaps:
-            counts.append(Counter(column))
+            tally = Counter(column)
         else:
-            counts.append(Counter(char for char in column if char not in gap_chars))
+            tally = Counter(char for char in column if char not in gap_chars)
+        # Match the matrix path, which keys residues in code point order.
+        counts.append(Counter(dict(sorted(tally.items()))))
     return counts
 
 
@@ -119,6 +140,10 @@ def column_gap_fraction(
 
     gap_chars = set(gap_characters or DEFAULT_GAP_CHARACTERS)
     total = frame.num_sequences
+    residues = frame.residue_matrix()
+    if residues is not None and total:
+        gaps = residues.shape[0] - np.count_nonzero(_non_gap_mask(residues, gap_chars), axis=0)
+        return (gaps / total).tolist()
     fractions: list[float] = []
     for column in zip_strict(*frame.sequences):
         gap_count = sum(1 for char in column if char in gap_chars)
@@ -134,6 +159,13 @@ def column_shannon_entropy(
     """Return per-column Shannon entropy (base 2) ignoring gaps."""
 
     gap_chars = set(gap_characters or DEFAULT_GAP_CHARACTERS)
+    counts = _frame_residue_counts(frame, gap_chars)
+    if counts is not None:
+        totals = counts.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = counts / totals
+            terms = np.where(counts > 0, p * np.log2(p), 0.0)
+        return (0.0 - terms.sum(axis=0)).tolist()
     entropies: list[float] = []
     for column_counts in column_base_counts(frame, gap_characters=gap_chars, include_gaps=False):
         total = sum(column_counts.values())
@@ -162,6 +194,9 @@ def parsimony_informative_columns(
     """
 
     gap_chars = set(gap_characters or DEFAULT_GAP_CHARACTERS)
+    counts = _frame_residue_counts(frame, gap_chars)
+    if counts is not None:
+        return (np.count_nonzero(counts >= 2, axis=0) >= 2).tolist()
     informative: list[bool] = []
     for column_counts in column_base_counts(frame, gap_characters=gap_chars, include_gaps=False):
         qualifying = sum(1 for count in column_counts.values() if count >= 2)
@@ -177,6 +212,9 @@ def constant_columns(
     """Return a mask indicating which columns are constant (ignoring gaps)."""
 
     gap_chars = set(gap_characters or DEFAULT_GAP_CHARACTERS)
+    counts = _frame_residue_counts(frame, gap_chars)
+    if counts is not None:
+        return (np.count_nonzero(counts, axis=0) == 1).tolist()
     constant_mask: list[bool] = []
     for column_counts in column_base_counts(frame, gap_characters=gap_chars, include_gaps=False):
         non_zero = [count for count in column_counts.values() if count > 0]
@@ -203,7 +241,36 @@ def pairwise_identity_matrix(
     """
 
     gap_chars = set(gap_characters or DEFAULT_GAP_CHARACTERS)
-    sequences = frame.sequences
+    residues = frame.residue_matrix()
+    if residues is None:
+        return _pairwise_identity_lists(frame.sequences, gap_chars)
+
+    n = frame.num_sequences
+    valid = _non_gap_mask(residues, gap_chars)
+    coverage = np.zeros((n, n), dtype=np.int64)
+    matches = np.zeros((n, n), dtype=np.int64)
+    # Count shared non-gap columns and shared residues as indicator-matrix products,
+    # a tile of columns at a time, instead of comparing every pair residue by residue.
+    step = max(1, _PAIRWISE_TILE_CELLS // n)
+    for start in range(0, residues.shape[1], step):
+        block = residues[:, start : start + step]
+        block_valid = valid[:, start : start + step]
+        indicator = block_valid.astype(np.float32)
+        coverage += (indicator @ indicator.T).astype(np.int64)
+        for symbol in np.unique(block[block_valid]):
+            indicator = (block == symbol).astype(np.float32)
+            matches += (indicator @ indicator.T).astype(np.int64)
+    np.fill_diagonal(coverage, 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        identity = np.where(coverage > 0, matches / np.maximum(coverage, 1), np.nan)
+    np.fill_diagonal(identity, 1.0)
+    return PairwiseIdentityResult(matrix=identity.tolist(), coverage=coverage.tolist())
+
+
+def _pairwise_identity_lists(
+    sequences: Sequence[str], gap_chars: set[str]
+) -> PairwiseIdentityResult:
     n = len(sequences)
     matches = [[0] * n for _ in range(n)]
     coverage = [[0] * n for _ in range(n)]
@@ -240,6 +307,35 @@ def pairwise_identity_matrix(
     return PairwiseIdentityResult(matrix=matrix, coverage=coverage)
 
 
+def _non_gap_mask(residues: np.ndarray, gap_chars: Iterable[str]) -> np.ndarray:
+    """Return a boolean mask of the entries of *residues* that are not gaps."""
+
+    # Only single latin-1 characters can match an entry of the residue matrix.
+    gap_codes = [ord(char) for char in gap_chars if len(char) == 1 and ord(char) < 256]
+    return ~np.isin(residues, gap_codes)
+
+
+def _frame_residue_counts(frame: AlignmentFrame, gap_chars: set[str]) -> np.ndarray | None:
+    """Return :func:`_column_residue_counts` column counts, or ``None`` without a matrix."""
+
+    residues = frame.residue_matrix()
+    if residues is None:
+        return None
+    return _column_residue_counts(residues, _non_gap_mask(residues, gap_chars))[1]
+
+
+def _column_residue_counts(
+    residues: np.ndarray, valid: np.ndarray
+) -> tuple[str, np.ndarray]:
+    """Return the *valid* symbols present and an (S, L) array of their column counts."""
+
+    present = np.flatnonzero(np.bincount(residues[valid], minlength=256))
+    counts = np.zeros((present.size, residues.shape[1]), dtype=np.int64)
+    for row, symbol in enumerate(present):
+        counts[row] = np.count_nonzero(residues == symbol, axis=0)
+    return present.astype(np.uint8).tobytes().decode("latin-1"), counts
+
+
 def alignment_length_excluding_gaps(
     frame: AlignmentFrame,
     *,
@@ -263,6 +359,9 @@ def variable_site_count(
     """Count columns that exhibit more than one residue ignoring gaps."""
 
     gap_chars = set(gap_characters or DEFAULT_GAP_CHARACTERS)
+    counts = _frame_residue_counts(frame, gap_chars)
+    if counts is not None:
+        return int(np.count_nonzero(np.count_nonzero(counts, axis=0) >= 2))
     variable = 0
     for column in zip_strict(*frame.sequences):
         residues = {char for char in column if char not in gap_chars}
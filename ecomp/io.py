@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import mmap
+import operator
 from dataclasses import field
 from pathlib import Path
 from typing import Iterable, Sequence
 
+import numpy as np
 from Bio import AlignIO
 from Bio.Align import MultipleSeqAlignment
 from Bio.Seq import Seq
@@ -14,6 +17,9 @@ from Bio.SeqRecord import SeqRecord
 from .config import DEFAULT_OUTPUT_FORMAT, detect_format_from_suffix
 from ._compat import dataclass, zip_strict
 
+# Leading bytes whose symbols seed the alphabet scan before the bulk strip pass.
+_ALPHABET_SAMPLE_BYTES = 4096
+
 
 @dataclass(slots=True)
 class AlignmentFrame:
@@ -23,6 +29,15 @@ class AlignmentFrame:
     sequences: list[str]
     alphabet: list[str]
     metadata: dict[str, object] = field(default_factory=dict)
+    # Cached residue matrix: None until built, False when not representable.
+    _residues: np.ndarray | bool | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # The sequence strings the cached matrix was built from, held so identity checks
+    # stay valid; edits to ``sequences`` after caching trigger a rebuild.
+    _residue_source: list[str] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         if not self.ids:
@@ -41,6 +56,34 @@ class AlignmentFrame:
     def alignment_length(self) -> int:
         return len(self.sequences[0]) if self.sequences else 0
 
+    def residue_matrix(self) -> np.ndarray | None:
+        """Return the sequences as a read-only ``(N, L)`` matrix of byte codes.
+
+        The matrix is built from the latin-1 encoding on first use and cached, so the
+        pipeline stages that slice rows or columns share one copy. The cache is rebuilt
+        whenever ``sequences`` no longer holds the strings it was built from. ``None`` is
+        returned when a residue falls outside latin-1.
+        """
+
+        sequences = self.sequences
+        source = self._residue_source
+        if (
+            self._residues is None
+            or source is None
+            or len(source) != len(sequences)
+            or not all(map(operator.is_, source, sequences))
+        ):
+            self._residue_source = list(sequences)
+            try:
+                data = "".join(sequences).encode("latin-1")
+            except UnicodeEncodeError:
+                self._residues = False
+            else:
+                self._residues = np.frombuffer(data, dtype=np.uint8).reshape(
+                    len(sequences), self.alignment_length
+                )
+        return None if self._residues is False else self._residues
+
     def alphabet_string(self) -> str:
         """Return the alphabet as a deterministic string representation."""
 
@@ -61,14 +104,80 @@ def read_alignment(path: str | Path, fmt: str | None = None) -> AlignmentFrame:
     path = Path(path)
     if fmt is None:
         fmt = detect_format_from_suffix(str(path)) or DEFAULT_OUTPUT_FORMAT
-    alignment = AlignIO.read(str(path), fmt)
-    ids = [record.id for record in alignment]
-    sequences = [str(record.seq) for record in alignment]
-    alphabet = sorted({char for seq in sequences for char in seq})
+    records = _read_fasta_records(path) if fmt == "fasta" else None
+    if records is not None:
+        ids, sequences = records
+    else:
+        alignment = AlignIO.read(str(path), fmt)
+        ids = [record.id for record in alignment]
+        sequences = [str(record.seq) for record in alignment]
+    alphabet = _sequence_alphabet(sequences)
     metadata = {"source_path": str(path), "source_format": fmt}
     return AlignmentFrame(ids=ids, sequences=sequences, alphabet=alphabet, metadata=metadata)
 
 
+def _read_fasta_records(path: Path) -> tuple[list[str], list[str]] | None:
+    """Parse a plain FASTA alignment straight from a memory map.
+
+    Mirrors Biopython's ``fasta`` parser (the first word of each title is the ID;
+    spaces, tabs and newlines are dropped from sequences) without per-line Python
+    work. Returns ``None`` when Biopython should read the file instead: empty or
+    unmappable inputs, text before the first record, carriage returns, non-ASCII
+    residues or sequences of unequal length, so its results and errors still apply.
+    """
+
+    ids: list[str] = []
+    sequences: list[str] = []
+    with path.open("rb") as handle:
+        try:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        with data:
+            if data[:1] != b">" or data.find(b"\r") != -1:
+                return None
+            size = len(data)
+            start = 0
+            while start < size:
+                title_end = data.find(b"\n", start)
+                if title_end == -1:
+                    title_end = size
+                next_record = data.find(b"\n>", title_end)
+                record_end = size if next_record == -1 else next_record + 1
+                try:
+                    title = data[start + 1 : title_end].decode("utf-8")
+                except UnicodeDecodeError:
+                    return None
+                residues = data[title_end:record_end].translate(None, b" \t\n")
+                if not residues.isascii():
+                    return None
+                words = title.split(None, 1)
+                ids.append(words[0] if words else "")
+                sequences.append(residues.decode("ascii"))
+                start = record_end
+    if len(set(map(len, sequences))) != 1:
+        return None
+    return ids, sequences
+
+
+def _sequence_alphabet(sequences: Sequence[str]) -> list[str]:
+    """Return the sorted distinct characters of *sequences*."""
+
+    try:
+        data = "".join(sequences).encode("latin-1")
+    except UnicodeEncodeError:
+        return sorted(set().union(*sequences))
+    # Symbols seen near the start are stripped in one C-level pass, so only the
+    # (usually empty) remainder needs counting.
+    present = set(data[:_ALPHABET_SAMPLE_BYTES])
+    rest = data.translate(None, bytes(present))
+    if rest:
+        counts = np.bincount(np.frombuffer(rest, dtype=np.uint8), minlength=256)
+        present.update(np.flatnonzero(counts).tolist())
+    # Code point order matches string order for single latin-1 characters.
+    return [chr(code) for code in sorted(present)]
+
+
 def write_alignment(
     frame: AlignmentFrame,
     path: str | Path,
@@ -95,7 +204,7 @@ def alignment_from_sequences(
 ) -> AlignmentFrame:
     """Construct an :class:`AlignmentFrame` directly from sequences."""
 
-    alphabet_values = alphabet or {char for seq in sequences for char in seq}
+    alphabet_values = alphabet or _sequence_alphabet(sequences)
     return AlignmentFrame(
         ids=list(ids),
         sequences=list(sequences),
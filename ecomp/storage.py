@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import json
+import mmap
+import os
 import struct
 import zlib
 from pathlib import Path
@@ -16,14 +18,29 @@ from .config import (
     METADATA_SUFFIX,
 )
 
-_HEADER_LEGACY_STRUCT = LEGACY_HEADER_STRUCT
-_HEADER_LEGACY_SIZE = struct.calcsize(_HEADER_LEGACY_STRUCT)
-_HEADER_CURRENT_STRUCT = HEADER_STRUCT
-_HEADER_CURRENT_SIZE = struct.calcsize(_HEADER_CURRENT_STRUCT)
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - environment without orjson
+    orjson = None
+
+# Headers are packed with precompiled structs so each archive skips format parsing.
+_HEADER_LEGACY_STRUCT = struct.Struct(LEGACY_HEADER_STRUCT)
+_HEADER_LEGACY_SIZE = _HEADER_LEGACY_STRUCT.size
+_HEADER_CURRENT_STRUCT = struct.Struct(HEADER_STRUCT)
+_HEADER_CURRENT_SIZE = _HEADER_CURRENT_STRUCT.size
+_METADATA_LENGTH_STRUCT = struct.Struct(">Q")
 _INLINE_METADATA_VERSION: Tuple[int, int, int] = (0, 2, 0)
 
+# Archives up to this size are read with a single read(); mapping costs more for them.
+_MMAP_MIN_ARCHIVE_BYTES = 128 * 1024
+
 _METADATA_COMPRESSED_MAGIC = b"ECMZ"
 _METADATA_CODEC_VERSION = 1
+# Metadata is small; level 6 keeps nearly all of level 9's ratio at a fraction of the cost.
+_METADATA_COMPRESSION_LEVEL = 6
+_METADATA_MIN_COMPRESS_BYTES = 512
+# Shared stdlib encoder so writes skip per-call encoder construction.
+_JSON_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
 
 
 def write_payload(path: str | Path, payload: bytes, metadata: dict[str, Any]) -> Path:
@@ -43,20 +60,40 @@ def write_archive(path: str | Path, payload: bytes, metadata: dict[str, Any]) ->
     """Persist *payload* and *metadata* in a single `.ecomp` file."""
 
     path = Path(path)
+    with path.open("wb") as handle:
+        handle.writelines(_archive_parts(payload, metadata))
+    return path
+
+
+def encode_archive(payload: bytes, metadata: dict[str, Any]) -> bytes:
+    """Return the `.ecomp` bytes :func:`write_archive` would write, without touching disk."""
+
+    return b"".join(_archive_parts(payload, metadata))
+
+
+def decode_archive(data: bytes) -> tuple[bytes, dict[str, Any], Tuple[int, int, int]]:
+    """Return ``(payload, metadata, version)`` for in-memory `.ecomp` *data*.
+
+    Only archives with inline metadata (format >= 0.2.0) can be decoded this way.
+    """
+
+    if len(data) < _HEADER_LEGACY_SIZE:
+        raise ValueError("File is too short to be a valid .ecomp payload")
+    payload, metadata_bytes, version = _split_archive(data)
+    if metadata_bytes is None:
+        raise ValueError("Legacy archive formats require a metadata sidecar")
+    return payload, _decode_metadata(metadata_bytes), version
+
+
+def _archive_parts(payload: bytes, metadata: dict[str, Any]) -> tuple[bytes, bytes, bytes]:
     metadata_bytes = _encode_metadata(metadata, add_trailing_newline=False)
-    header = struct.pack(
-        _HEADER_CURRENT_STRUCT,
+    header = _HEADER_CURRENT_STRUCT.pack(
         HEADER_MAGIC,
         *FORMAT_VERSION_TUPLE,
         len(payload),
         len(metadata_bytes),
     )
-
-    with path.open("wb") as handle:
-        handle.write(header)
-        handle.write(payload)
-        handle.write(metadata_bytes)
-    return path
+    return header, payload, metadata_bytes
 
 
 def read_archive(
@@ -71,13 +108,34 @@ def read_archive(
     """
 
     path = Path(path)
-    data = path.read_bytes()
-    if len(data) < _HEADER_LEGACY_SIZE:
-        raise ValueError("File is too short to be a valid .ecomp payload")
+    with path.open("rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size < _HEADER_LEGACY_SIZE:
+            raise ValueError("File is too short to be a valid .ecomp payload")
+        if size < _MMAP_MIN_ARCHIVE_BYTES:
+            payload, metadata_bytes, version = _split_archive(handle.read())
+        else:
+            # Map large files so only the payload and metadata slices are copied into memory.
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                payload, metadata_bytes, version = _split_archive(data)
+
+    if metadata_bytes is not None:
+        metadata_dict = _decode_metadata(metadata_bytes)
+    else:
+        metadata_location = Path(metadata_path) if metadata_path else derive_metadata_path(path)
+        if not metadata_location.exists():
+            raise FileNotFoundError(
+                "Metadata sidecar is required for legacy archive formats"
+            )
+        metadata_dict = read_metadata(metadata_location)
 
-    magic, major, minor, patch, payload_length = struct.unpack(
-        _HEADER_LEGACY_STRUCT, data[:_HEADER_LEGACY_SIZE]
-    )
+    return payload, metadata_dict, version
+
+
+def _split_archive(data: bytes | mmap.mmap) -> tuple[bytes, bytes | None, Tuple[int, int, int]]:
+    """Return the payload and inline metadata bytes (``None`` for legacy archives)."""
+
+    magic, major, minor, patch, payload_length = _HEADER_LEGACY_STRUCT.unpack_from(data)
     if magic != HEADER_MAGIC:
         raise ValueError("Invalid .ecomp magic header")
 
@@ -87,7 +145,7 @@ def read_archive(
     if version >= _INLINE_METADATA_VERSION:
         if len(data) < _HEADER_CURRENT_SIZE:
             raise ValueError("File is truncated; missing metadata header")
-        metadata_length = struct.unpack(">Q", data[offset:_HEADER_CURRENT_SIZE])[0]
+        metadata_length = _METADATA_LENGTH_STRUCT.unpack_from(data, offset)[0]
         offset = _HEADER_CURRENT_SIZE
     else:
         metadata_length = None
@@ -97,21 +155,12 @@ def read_archive(
         raise ValueError("Payload length does not match header metadata")
     payload = data[offset:payload_end]
 
-    if metadata_length is not None:
-        metadata_end = payload_end + metadata_length
-        if len(data) < metadata_end:
-            raise ValueError("Metadata length does not match header metadata")
-        metadata_bytes = data[payload_end:metadata_end]
-        metadata_dict = _decode_metadata(metadata_bytes)
-    else:
-        metadata_location = Path(metadata_path) if metadata_path else derive_metadata_path(path)
-        if not metadata_location.exists():
-            raise FileNotFoundError(
-                "Metadata sidecar is required for legacy archive formats"
-            )
-        metadata_dict = read_metadata(metadata_location)
-
-    return payload, metadata_dict, version
+    if metadata_length is None:
+        return payload, None, version
+    metadata_end = payload_end + metadata_length
+    if len(data) < metadata_end:
+        raise ValueError("Metadata length does not match header metadata")
+    return payload, data[payload_end:metadata_end], version
 
 
 def write_metadata(path: str | Path, metadata: dict[str, Any]) -> Path:
@@ -137,11 +186,11 @@ def derive_metadata_path(ecomp_path: Path) -> Path:
 
 
 def _encode_metadata(metadata: dict[str, Any], *, add_trailing_newline: bool) -> bytes:
-    json_bytes = json.dumps(metadata, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    compressed = zlib.compress(json_bytes, level=9)
-    use_compressed = len(compressed) + len(_METADATA_COMPRESSED_MAGIC) + 1 < len(json_bytes)
-    if use_compressed:
-        return _METADATA_COMPRESSED_MAGIC + bytes([_METADATA_CODEC_VERSION]) + compressed
+    json_bytes = _dump_json(metadata)
+    if len(json_bytes) >= _METADATA_MIN_COMPRESS_BYTES:
+        compressed = zlib.compress(json_bytes, level=_METADATA_COMPRESSION_LEVEL)
+        if len(compressed) + len(_METADATA_COMPRESSED_MAGIC) + 1 < len(json_bytes):
+            return _METADATA_COMPRESSED_MAGIC + bytes([_METADATA_CODEC_VERSION]) + compressed
     if add_trailing_newline:
         return json_bytes + b"\n"
     return json_bytes
@@ -157,4 +206,19 @@ def _decode_metadata(data: bytes) -> dict[str, Any]:
         json_bytes = zlib.decompress(data[len(_METADATA_COMPRESSED_MAGIC) + 1 :])
     else:
         json_bytes = data
+    return _load_json(json_bytes)
+
+
+def _dump_json(metadata: dict[str, Any]) -> bytes:
+    # Always the stdlib encoder: orjson would write NaN/Infinity as null and drop the
+    # \u escapes, changing both the stored values and the on-disk bytes.
+    return _JSON_ENCODER.encode(metadata).encode("utf-8")
+
+
+def _load_json(json_bytes: bytes) -> dict[str, Any]:
+    if orjson is not None:
+        try:
+            return orjson.loads(json_bytes)
+        except ValueError:
+            pass  # e.g. NaN literals written by the stdlib encoder
     return json.loads(json_bytes.decode("utf-8"))
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import contextlib
+import io
 import sys
 from pathlib import Path
 
@@ -17,3 +19,61 @@ if str(_SRC_PATH) not in sys.path:
 def pytest_configure(config: pytest.Config) -> None:
     config.addinivalue_line("markers", "integration: mark integration tests")
     config.addinivalue_line("markers", "slow: mark slow tests")
+
+
+def _zip_alignment(directory: Path, name: str, body: bytes) -> Path:
+    from ecomp.cli import main as ecomp_main
+
+    alignment = directory / f"{name}.fasta"
+    alignment.write_bytes(body)
+    archive = directory / f"{name}.ecomp"
+    assert ecomp_main(["zip", str(alignment), "-o", str(archive)]) == 0
+    return archive
+
+
+@pytest.fixture(scope="session")
+def run_cli():
+    """Return a runner that invokes ``ecomp`` in-process and yields ``(code, stdout)``."""
+
+    from ecomp.cli import main as ecomp_main
+
+    def _run(argv: list[str]) -> tuple[int, str]:
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            code = ecomp_main(argv)
+        return code, buffer.getvalue()
+
+    return _run
+
+
+@pytest.fixture(scope="session")
+def metrics_archive(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Archive of a four-taxon alignment shared by the metric subcommand tests."""
+
+    directory = tmp_path_factory.mktemp("metrics")
+    return _zip_alignment(directory, "metrics", b">a\nACGTT\n>b\nA-GTT\n>c\nATGCT\n>d\nATGCT\n")
+
+
+@pytest.fixture(scope="session")
+def variable_archive(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Archive with no constant or parsimony-informative columns."""
+
+    directory = tmp_path_factory.mktemp("variable")
+    return _zip_alignment(directory, "variable", b">x\nAC\n>y\nCA\n")
+
+
+@pytest.fixture(scope="session")
+def single_archive(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Archive holding a single sequence."""
+
+    directory = tmp_path_factory.mktemp("single")
+    return _zip_alignment(directory, "single", b">solo\nAAAA\n")
+
+
+@pytest.fixture(scope="session")
+def metric_subcommand_archive(tmp_path_factory: pytest.TempPathFactory) -> tuple[Path, Path]:
+    """Return ``(alignment, archive)`` for the gapped three-taxon metrics alignment."""
+
+    directory = tmp_path_factory.mktemp("metric_subcommands")
+    archive = _zip_alignment(directory, "metrics", b">s1\nACGT\n>s2\nA-GT\n>s3\nATGT\n")
+    return archive.with_suffix(".fasta"), archive
@@ -1,21 +1,35 @@
+import io
 import json
-import math
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from ecomp.cli import main as ecomp_main
 from ecomp.io import read_alignment
-from ecomp.storage import read_metadata
+from ecomp.storage import read_archive, read_metadata
 
-FASTA_BODY = ">s1\nACGTACGT\n>s2\nACGTTCGT\n"
-TREE_BODY = "(s1:0.1,s2:0.2);\n"
+FASTA_BODY = b">s1\nACGTACGT\n>s2\nACGTTCGT\n"
+EXPECTED_IDS = ["s1", "s2"]
+EXPECTED_SEQUENCES = ["ACGTACGT", "ACGTTCGT"]
+TREE_BODY = b"(s1:0.1,s2:0.2);\n"
+
+
+@pytest.fixture(scope="module")
+def input_paths(tmp_path_factory: pytest.TempPathFactory) -> dict[str, Path]:
+    """Write the shared FASTA and tree inputs once for every test in this module."""
+
+    directory = tmp_path_factory.mktemp("cli_inputs")
+    alignment = directory / "example.fasta"
+    alignment.write_bytes(FASTA_BODY)
+    tree = directory / "example.tree"
+    tree.write_bytes(TREE_BODY)
+    return {"alignment": alignment, "tree": tree}
 
 
 @pytest.mark.integration
-def test_cli_compress_and_decompress_alignment(tmp_path: Path) -> None:
-    alignment = tmp_path / "example.fasta"
-    alignment.write_text(FASTA_BODY)
+def test_cli_compress_and_decompress_alignment(tmp_path: Path, input_paths) -> None:
+    alignment = input_paths["alignment"]
 
     archive = tmp_path / "example.ecomp"
     restored = tmp_path / "restored.fasta"
@@ -43,18 +57,15 @@ def test_cli_compress_and_decompress_alignment(tmp_path: Path) -> None:
         str(restored),
     ]) == 0
 
-    original = read_alignment(alignment)
     round_tripped = read_alignment(restored)
-    assert original.sequences == round_tripped.sequences
-    assert original.ids == round_tripped.ids
+    assert round_tripped.sequences == EXPECTED_SEQUENCES
+    assert round_tripped.ids == EXPECTED_IDS
 
 
 @pytest.mark.integration
-def test_cli_compress_with_tree_for_ordering(tmp_path: Path) -> None:
-    alignment = tmp_path / "with_tree.fasta"
-    alignment.write_text(FASTA_BODY)
-    tree = tmp_path / "with_tree.tree"
-    tree.write_text(TREE_BODY)
+def test_cli_compress_with_tree_for_ordering(tmp_path: Path, input_paths) -> None:
+    alignment = input_paths["alignment"]
+    tree = input_paths["tree"]
 
     archive = tmp_path / "with_tree.ecomp"
     metadata = tmp_path / "with_tree.json"
@@ -80,31 +91,26 @@ def test_cli_compress_with_tree_for_ordering(tmp_path: Path) -> None:
         str(restored),
     ]) == 0
 
-    original = read_alignment(alignment)
     round_tripped = read_alignment(restored)
-    assert original.sequences == round_tripped.sequences
-    assert original.ids == round_tripped.ids
+    assert round_tripped.sequences == EXPECTED_SEQUENCES
+    assert round_tripped.ids == EXPECTED_IDS
 
     stored_metadata = read_metadata(metadata)
     assert "tree_newick" not in stored_metadata
 
 
 @pytest.mark.integration
-def test_cli_inspect_summary(tmp_path: Path, capsys) -> None:
-    alignment = tmp_path / "inspect.fasta"
-    alignment.write_text(FASTA_BODY)
+def test_cli_inspect_summary(tmp_path: Path, input_paths, run_cli, capsys) -> None:
+    alignment = input_paths["alignment"]
     archive = tmp_path / "inspect.ecomp"
 
-    assert ecomp_main([
+    code, _ = run_cli([
         "zip",
         str(alignment),
         "-o",
         str(archive),
-    ]) == 0
-
-    capsys.readouterr()
-
-    capsys.readouterr()  # clear zip output before metrics
+    ])
+    assert code == 0
 
     assert ecomp_main([
         "inspect",
@@ -119,124 +125,140 @@ def test_cli_inspect_summary(tmp_path: Path, capsys) -> None:
 
 
 @pytest.mark.integration
-def test_cli_inspect_raw_json(tmp_path: Path, capsys) -> None:
-    alignment = tmp_path / "inspect_raw.fasta"
-    alignment.write_text(FASTA_BODY)
+def test_cli_inspect_raw_json(tmp_path: Path, input_paths, run_cli, capsys) -> None:
+    alignment = input_paths["alignment"]
     archive = tmp_path / "inspect_raw.ecomp"
 
-    assert ecomp_main([
+    code, _ = run_cli([
         "zip",
         str(alignment),
         "-o",
         str(archive),
-    ]) == 0
-
-    capsys.readouterr()  # clear zip output
+    ])
+    assert code == 0
 
     assert ecomp_main([
         "inspect",
         str(archive),
     ]) == 0
 
-    metadata = json.loads(capsys.readouterr().out)
+    _, metadata, _ = read_archive(archive)
     assert metadata["codec"] == "ecomp"
     assert metadata["num_sequences"] == 2
+    assert capsys.readouterr().out == json.dumps(metadata, indent=2, sort_keys=True) + "\n"
 
 
 @pytest.mark.integration
-def test_cli_metrics_commands(tmp_path: Path, capsys) -> None:
-    alignment = tmp_path / "metrics.fasta"
-    alignment.write_text(
-        ">a\nACGTT\n>b\nA-GTT\n>c\nATGCT\n>d\nATGCT\n"
-    )
-    archive = tmp_path / "metrics.ecomp"
-
-    assert ecomp_main([
-        "zip",
-        str(alignment),
-        "-o",
-        str(archive),
-    ]) == 0
-
-    capsys.readouterr()
-
-    assert ecomp_main([
+def test_cli_consensus_commands(metrics_archive: Path, run_cli) -> None:
+    code, out = run_cli([
         "consensus_sequence",
-        str(archive),
-    ]) == 0
-    output = capsys.readouterr().out.strip().splitlines()
+        str(metrics_archive),
+    ])
+    assert code == 0
+    output = out.strip().splitlines()
     assert output == [">consensus", "ATGYT"]
 
-    assert ecomp_main([
+    code, out = run_cli([
         "con_seq",
-        str(archive),
+        str(metrics_archive),
         "--header",
         "alias",
         "--no-checksum",
-    ]) == 0
-    alias_output = capsys.readouterr().out.strip().splitlines()
+    ])
+    assert code == 0
+    alias_output = out.strip().splitlines()
     assert alias_output == [">alias", "ATGYT"]
 
-    assert ecomp_main([
+
+@pytest.mark.integration
+def test_cli_column_base_counts(metrics_archive: Path, run_cli) -> None:
+    code, out = run_cli([
         "column_base_counts",
-        str(archive),
+        str(metrics_archive),
         "--indent",
         "0",
-    ]) == 0
-    counts = json.loads(capsys.readouterr().out)
+    ])
+    assert code == 0
+    counts = json.loads(out)
     assert counts[0]["counts"] == {"A": 4}
     assert counts[1]["counts"] == {"C": 1, "T": 2}
 
-    assert ecomp_main([
+    code, out = run_cli([
         "col_counts",
-        str(archive),
+        str(metrics_archive),
         "--include-gaps",
         "--indent",
         "0",
-    ]) == 0
-    counts_with_gaps = json.loads(capsys.readouterr().out)
+    ])
+    assert code == 0
+    counts_with_gaps = json.loads(out)
     assert counts_with_gaps[1]["counts"] == {"C": 1, "T": 2, "-": 1}
 
-    assert ecomp_main([
-        "gap_fraction",
-        str(archive),
-    ]) == 0
-    gap_lines = capsys.readouterr().out.strip().splitlines()
-    frac_values = {int(idx): float(value) for idx, value in (line.split("\t") for line in gap_lines)}
-    assert frac_values[1] == 0.0
-    assert math.isclose(frac_values[2], 0.25, rel_tol=1e-9)
 
-    assert ecomp_main([
+def _parse_column_values(text: str) -> np.ndarray:
+    return np.loadtxt(io.StringIO(text), delimiter="\t", ndmin=2)
+
+
+@pytest.mark.integration
+def test_cli_column_statistics(metrics_archive: Path, run_cli) -> None:
+    code, out = run_cli([
+        "gap_fraction",
+        str(metrics_archive),
+    ])
+    assert code == 0
+    gap_values = _parse_column_values(out)
+    np.testing.assert_array_equal(gap_values[:, 0], np.arange(1, 6))
+    np.testing.assert_allclose(gap_values[:, 1], [0.0, 0.25, 0.0, 0.0, 0.0], rtol=1e-9)
+
+    code, out = run_cli([
         "shannon_entropy",
-        str(archive),
-    ]) == 0
-    entropy_lines = capsys.readouterr().out.strip().splitlines()
-    entropy_values = {int(idx): float(value) for idx, value in (line.split("\t") for line in entropy_lines)}
-    assert entropy_values[1] == 0.0
-    assert math.isclose(entropy_values[2], 0.918295, rel_tol=1e-5)
-    assert math.isclose(entropy_values[4], 1.0, rel_tol=1e-6)
+        str(metrics_archive),
+    ])
+    assert code == 0
+    entropy_values = _parse_column_values(out)
+    np.testing.assert_array_equal(entropy_values[:, 0], np.arange(1, 6))
+    np.testing.assert_allclose(
+        entropy_values[:, 1], [0.0, 0.918295, 0.0, 1.0, 0.0], rtol=1e-5, atol=1e-12
+    )
 
-    assert ecomp_main([
-        "parsimony_informative_sites",
-        str(archive),
-    ]) == 0
-    pis_lines = capsys.readouterr().out.strip().splitlines()
-    assert pis_lines[0] == "total\t1"
-    assert pis_lines[1] == "indices\t4"
 
-    assert ecomp_main([
-        "constant_columns",
-        str(archive),
-    ]) == 0
-    const_lines = capsys.readouterr().out.strip().splitlines()
-    assert const_lines[0] == "total\t3"
-    assert const_lines[1] == "indices\t1 3 5"
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "command, expected",
+    [
+        ("parsimony_informative_sites", ["total\t1", "indices\t4"]),
+        ("constant_columns", ["total\t3", "indices\t1 3 5"]),
+    ],
+)
+def test_cli_site_classification(metrics_archive: Path, run_cli, command, expected) -> None:
+    code, out = run_cli([
+        command,
+        str(metrics_archive),
+    ])
+    assert code == 0
+    lines = out.strip().splitlines()
+    assert lines[: len(expected)] == expected
 
-    assert ecomp_main([
+
+@pytest.mark.integration
+@pytest.mark.parametrize("command", ["parsimony_informative_sites", "constant_columns"])
+def test_cli_site_classification_without_hits(variable_archive: Path, run_cli, command) -> None:
+    code, out = run_cli([
+        command,
+        str(variable_archive),
+    ])
+    assert code == 0
+    assert out.strip().splitlines() == ["total\t0"]
+
+
+@pytest.mark.integration
+def test_cli_pairwise_identity(metrics_archive: Path, run_cli) -> None:
+    code, out = run_cli([
         "pairwise_identity",
-        str(archive),
-    ]) == 0
-    pid_output = capsys.readouterr().out.strip().splitlines()
+        str(metrics_archive),
+    ])
+    assert code == 0
+    pid_output = out.strip().splitlines()
     assert pid_output[0].startswith("id\t")
     identity_header = pid_output[0].split("\t")
     assert identity_header[1:] == ["a", "b", "c", "d"]
@@ -245,98 +267,112 @@ def test_cli_metrics_commands(tmp_path: Path, capsys) -> None:
     assert first_row[1] == "1.000000"
     assert any(line.startswith("# coverage") for line in pid_output)
 
-    assert ecomp_main([
+    code, out = run_cli([
         "pid",
-        str(archive),
+        str(metrics_archive),
         "--no-checksum",
-    ]) == 0
-    pid_alias_output = capsys.readouterr().out.strip().splitlines()
+    ])
+    assert code == 0
+    pid_alias_output = out.strip().splitlines()
     assert pid_alias_output[0] == pid_output[0]
 
-    variable_alignment = tmp_path / "variable.fasta"
-    variable_alignment.write_text(">x\nAC\n>y\nCA\n")
-    variable_archive = variable_alignment.with_suffix(".ecomp")
-    assert ecomp_main([
-        "zip",
-        str(variable_alignment),
-    ]) == 0
-    capsys.readouterr()
 
-    assert ecomp_main([
-        "parsimony_informative_sites",
-        str(variable_archive),
-    ]) == 0
-    pis_zero = capsys.readouterr().out.strip().splitlines()
-    assert pis_zero == ["total\t0"]
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "command, expected",
+    [
+        ("alignment_length_excluding_gaps", "5"),
+        ("alignment_length", "5"),
+        ("variable_sites", "2"),
+    ],
+)
+def test_cli_alignment_counts(metrics_archive: Path, run_cli, command, expected) -> None:
+    code, out = run_cli([
+        command,
+        str(metrics_archive),
+    ])
+    assert code == 0
+    assert out.strip() == expected
 
-    assert ecomp_main([
-        "constant_columns",
-        str(variable_archive),
-    ]) == 0
-    const_zero = capsys.readouterr().out.strip().splitlines()
-    assert const_zero == ["total\t0"]
 
-    assert ecomp_main([
-        "alignment_length_excluding_gaps",
-        str(archive),
-    ]) == 0
-    len_no_gaps = capsys.readouterr().out.strip()
-    assert len_no_gaps == "5"
+@pytest.mark.integration
+def test_cli_identity_and_composition(metrics_archive: Path, run_cli) -> None:
+    code, out = run_cli([
+        "percentage_identity",
+        str(metrics_archive),
+    ])
+    assert code == 0
+    pct_identity = float(out.strip())
+    assert 50.0 < pct_identity < 100.0
 
-    assert ecomp_main([
-        "alignment_length",
-        str(archive),
-    ]) == 0
-    total_len = capsys.readouterr().out.strip()
-    assert total_len == "5"
+    code, out = run_cli([
+        "relative_composition_variability",
+        str(metrics_archive),
+    ])
+    assert code == 0
+    rcv_value = float(out.strip())
+    assert rcv_value >= 0.0
 
-    assert ecomp_main([
-        "variable_sites",
-        str(archive),
-    ]) == 0
-    var_sites = capsys.readouterr().out.strip()
-    assert var_sites == "2"
 
-    assert ecomp_main([
+@pytest.mark.integration
+def test_cli_identity_and_composition_single_sequence(single_archive: Path, run_cli) -> None:
+    code, out = run_cli([
         "percentage_identity",
-        str(archive),
-    ]) == 0
-    pct_identity = float(capsys.readouterr().out.strip())
-    assert 50.0 < pct_identity < 100.0
+        str(single_archive),
+    ])
+    assert code == 0
+    assert out.strip() == "nan"
 
-    assert ecomp_main([
+    code, out = run_cli([
         "relative_composition_variability",
-        str(archive),
-    ]) == 0
-    rcv_value = float(capsys.readouterr().out.strip())
-    assert rcv_value >= 0.0
+        str(single_archive),
+    ])
+    assert code == 0
+    assert float(out.strip()) == 0.0
 
-    assert ecomp_main([
+
+@pytest.mark.integration
+def test_cli_distance_tree(metrics_archive: Path, run_cli) -> None:
+    code, out = run_cli([
         "distance_tree",
-        str(archive),
-    ]) == 0
-    tree_newick = capsys.readouterr().out.strip()
+        str(metrics_archive),
+    ])
+    assert code == 0
+    tree_newick = out.strip()
     assert tree_newick.endswith(";")
     for taxon in ["a", "b", "c", "d"]:
         assert taxon in tree_newick
 
-    single_alignment = tmp_path / "single.fasta"
-    single_alignment.write_text(">solo\nAAAA\n")
-    single_archive = single_alignment.with_suffix(".ecomp")
-    assert ecomp_main([
-        "zip",
-        str(single_alignment),
-    ]) == 0
-    capsys.readouterr()
 
-    assert ecomp_main([
-        "percentage_identity",
-        str(single_archive),
-    ]) == 0
-    assert capsys.readouterr().out.strip() == "nan"
+@pytest.mark.integration
+def test_cli_metrics_summary(metrics_archive: Path, run_cli) -> None:
+    code, out = run_cli([
+        "metrics_summary",
+        str(metrics_archive),
+    ])
+    assert code == 0
+    summary = json.loads(out)
+    assert summary["consensus"] == "ATGYT"
+    assert summary["alignment_length"] == 5
+    assert summary["alignment_length_excluding_gaps"] == 5
+    assert summary["variable_sites"] == 2
+    assert summary["parsimony_informative_sites"] == 1
+    assert summary["constant_columns"] == 3
+    assert 50.0 < summary["percentage_identity"] < 100.0
+    assert summary["relative_composition_variability"] >= 0.0
+    np.testing.assert_allclose(summary["gap_fraction"], [0.0, 0.25, 0.0, 0.0, 0.0], rtol=1e-9)
+    np.testing.assert_allclose(
+        summary["shannon_entropy"], [0.0, 0.918295, 0.0, 1.0, 0.0], rtol=1e-5, atol=1e-12
+    )
 
-    assert ecomp_main([
-        "relative_composition_variability",
+
+@pytest.mark.integration
+def test_cli_metrics_summary_single_sequence(single_archive: Path, run_cli) -> None:
+    code, out = run_cli([
+        "metrics",
         str(single_archive),
-    ]) == 0
-    assert float(capsys.readouterr().out.strip()) == 0.0
+    ])
+    assert code == 0
+    summary = json.loads(out)
+    assert summary["percentage_identity"] is None
+    assert summary["relative_composition_variability"] == 0.0
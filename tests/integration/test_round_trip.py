@@ -3,12 +3,14 @@ from pathlib import Path
 from ecomp import compress_file, decompress_file, read_alignment
 
 
-FASTA_CONTENT = ">seq1\nACGTACGT\n>seq2\nACGTTCGT\n>seq3\nACGTACGA\n"
+FASTA_CONTENT = b">seq1\nACGTACGT\n>seq2\nACGTTCGT\n>seq3\nACGTACGA\n"
+EXPECTED_IDS = ["seq1", "seq2", "seq3"]
+EXPECTED_SEQUENCES = ["ACGTACGT", "ACGTTCGT", "ACGTACGA"]
 
 
 def test_compress_and_decompress_round_trip(tmp_path: Path):
     input_path = tmp_path / "example.fasta"
-    input_path.write_text(FASTA_CONTENT)
+    input_path.write_bytes(FASTA_CONTENT)
 
     metadata_sidecar = tmp_path / "example.json"
     ecomp_path, metadata_path = compress_file(input_path, metadata_path=metadata_sidecar)
@@ -18,8 +20,7 @@ def test_compress_and_decompress_round_trip(tmp_path: Path):
     output_path = decompress_file(ecomp_path, metadata_path=metadata_path)
     assert output_path.exists()
 
-    original = read_alignment(input_path)
     restored = read_alignment(output_path)
 
-    assert original.sequences == restored.sequences
-    assert original.ids == restored.ids
+    assert restored.sequences == EXPECTED_SEQUENCES
+    assert restored.ids == EXPECTED_IDS
@@ -0,0 +1,37 @@
+import hashlib
+
+import pytest
+
+from ecomp.diagnostics import checksums
+from ecomp.diagnostics.checksums import alignment_checksum
+
+
+@pytest.mark.parametrize("batch_bytes", [1, 5, 1 << 18])
+def test_alignment_checksum_hashes_newline_terminated_sequences(monkeypatch, batch_bytes):
+    monkeypatch.setattr(checksums, "_CHECKSUM_BATCH_BYTES", batch_bytes)
+    sequences = ["ACGT", "A-GT", "ATGT"]
+    expected = hashlib.sha256(b"ACGT\nA-GT\nATGT\n").hexdigest()
+    assert alignment_checksum(sequences) == expected
+    assert alignment_checksum(iter(sequences)) == expected
+
+
+def test_alignment_checksum_of_empty_alignment():
+    assert alignment_checksum([]) == hashlib.sha256().hexdigest()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sharded_checksum_hashes_shard_digests(monkeypatch, workers):
+    monkeypatch.setattr(checksums, "_CHECKSUM_SHARD_BYTES", 10)
+    sequences = ["ACGT", "A-GT", "ATGT"]
+    shard_digests = [
+        hashlib.sha256(b"ACGT\nA-GT\n").digest(),
+        hashlib.sha256(b"ATGT\n").digest(),
+    ]
+    expected = hashlib.sha256(b"".join(shard_digests)).hexdigest()
+    assert alignment_checksum(sequences, mode="sharded", workers=workers) == expected
+    assert alignment_checksum(iter(sequences), mode="sharded", workers=workers) == expected
+
+
+def test_alignment_checksum_rejects_unknown_mode():
+    with pytest.raises(ValueError, match="Unsupported checksum mode"):
+        alignment_checksum(["ACGT"], mode="sampled")
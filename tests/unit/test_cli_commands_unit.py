@@ -5,32 +5,58 @@ from pathlib import Path
 import pytest
 
 from ecomp.cli import main as ecomp_main
+from ecomp.compression.pipeline import decompress_alignment
 from ecomp.diagnostics.metrics import (
     column_base_counts as metrics_column_base_counts,
     column_gap_fraction as metrics_column_gap_fraction,
     column_shannon_entropy as metrics_column_shannon_entropy,
     constant_columns as metrics_constant_columns,
     majority_rule_consensus,
-    pairwise_identity_matrix,
     parsimony_informative_columns,
     percentage_identity as metrics_percentage_identity,
     relative_composition_variability,
     variable_site_count as metrics_variable_site_count,
 )
 from ecomp.io import read_alignment
-from ecomp.storage import read_archive, write_archive
-
-FASTA_CONTENT = ">tax1\nACGTACGT\n>tax2\nACGTTCGT\n"
-TREE_CONTENT = "(tax1:0.1,tax2:0.2);\n"
+from ecomp.storage import decode_archive, encode_archive, read_archive
+
+FASTA_CONTENT = b">tax1\nACGTACGT\n>tax2\nACGTTCGT\n"
+EXPECTED_IDS = ["tax1", "tax2"]
+EXPECTED_SEQUENCES = ["ACGTACGT", "ACGTTCGT"]
+TREE_CONTENT = b"(tax1:0.1,tax2:0.2);\n"
+# The metric archive is produced in-session, so its checksum is verified once by
+# test_cli_metric_checksum_enforced rather than by every metric invocation.
+SKIP_CHECKSUM_ARGS = ["--no-checksum"]
+# Contents of the shared ``metric_subcommand_archive`` fixture alignment.
+METRIC_EXPECTED_IDS = ["s1", "s2", "s3"]
+METRIC_EXPECTED_SEQUENCES = ["ACGT", "A-GT", "ATGT"]
+# Written out by hand for ACGT / A-GT / ATGT so output drift cannot go unnoticed.
+PAIRWISE_IDENTITY_GOLDEN = (
+    "id\ts1\ts2\ts3\n"
+    "s1\t1.000000\t1.000000\t0.750000\n"
+    "s2\t1.000000\t1.000000\t1.000000\n"
+    "s3\t0.750000\t1.000000\t1.000000\n"
+    "# coverage\n"
+    "id\ts1\ts2\ts3\n"
+    "s1\t0\t3\t4\n"
+    "s2\t3\t0\t3\n"
+    "s3\t4\t3\t0\n"
+)
 
 
 def _write_alignment(path: Path) -> None:
-    path.write_text(FASTA_CONTENT)
+    path.write_bytes(FASTA_CONTENT)
 
 
-def test_cli_happy_path_round_trip(tmp_path, capsys):
-    alignment = tmp_path / "toy.fasta"
+@pytest.fixture(scope="module")
+def toy_alignment(tmp_path_factory):
+    alignment = tmp_path_factory.mktemp("toy") / "toy.fasta"
     _write_alignment(alignment)
+    return alignment
+
+
+def test_cli_happy_path_round_trip(tmp_path, toy_alignment, capsys):
+    alignment = toy_alignment
     archive = tmp_path / "toy.ecomp"
     metadata = tmp_path / "toy.json"
     restored = tmp_path / "toy_restored.fasta"
@@ -63,10 +89,9 @@ def test_cli_happy_path_round_trip(tmp_path, capsys):
     decompress_out = capsys.readouterr().out
     assert "Wrote alignment" in decompress_out
 
-    original = read_alignment(alignment)
     round_trip = read_alignment(restored)
-    assert original.sequences == round_trip.sequences
-    assert original.ids == round_trip.ids
+    assert round_trip.sequences == EXPECTED_SEQUENCES
+    assert round_trip.ids == EXPECTED_IDS
 
     assert ecomp_main([
         "inspect",
@@ -77,97 +102,87 @@ def test_cli_happy_path_round_trip(tmp_path, capsys):
     assert "Codec:" in summary
     assert "Sequences:" in summary
 
-    capsys.readouterr()
     assert ecomp_main(["inspect", str(archive)]) == 0
     raw_metadata = json.loads(capsys.readouterr().out)
-    assert raw_metadata["num_sequences"] == len(original.ids)
-    assert raw_metadata["alignment_length"] == len(original.sequences[0])
+    assert raw_metadata["num_sequences"] == len(EXPECTED_IDS)
+    assert raw_metadata["alignment_length"] == len(EXPECTED_SEQUENCES[0])
 
 
-def test_cli_decompress_no_checksum_allows_mismatch(tmp_path, capsys):
+def test_cli_decompress_no_checksum_allows_mismatch(tmp_path, run_cli):
     alignment = tmp_path / "with_tree.fasta"
     _write_alignment(alignment)
-    (tmp_path / "with_tree.tree").write_text(TREE_CONTENT)
+    (tmp_path / "with_tree.tree").write_bytes(TREE_CONTENT)
 
     # Use defaults for output paths to exercise derive_metadata_path
-    assert ecomp_main([
+    code, _ = run_cli([
         "compress",
         str(alignment),
         "--tree",
         str(tmp_path / "with_tree.tree"),
         "--stats",
-    ]) == 0
+    ])
+    assert code == 0
     archive = alignment.with_suffix(".ecomp")
-    payload, metadata, _ = read_archive(archive)
+    payload, metadata, _ = decode_archive(archive.read_bytes())
     metadata["checksum_sha256"] = "deadbeef"
-    write_archive(archive, payload, metadata)
+    archive.write_bytes(encode_archive(payload, metadata))
 
-    capsys.readouterr()
-    assert ecomp_main([
+    code, _ = run_cli([
         "decompress",
         str(archive),
         "--no-checksum",
-    ]) == 0
+    ])
+    assert code == 0
     output = alignment.with_suffix(".fasta")
     assert output.exists()
     round_trip = read_alignment(output)
-    assert len(round_trip.ids) == 2
+    assert round_trip.ids == EXPECTED_IDS
 
     # Ensure inspect raw JSON still works with derived metadata path
-    capsys.readouterr()
-    assert ecomp_main(["inspect", str(archive)]) == 0
-    metadata_json = json.loads(capsys.readouterr().out)
+    code, out = run_cli(["inspect", str(archive)])
+    assert code == 0
+    metadata_json = json.loads(out)
     assert metadata_json["ordering_strategy"]
 
 
-def test_cli_zip_raises_when_alignment_missing(tmp_path):
-    missing = tmp_path / "missing.fasta"
-    with pytest.raises(SystemExit, match="Alignment not found"):
-        ecomp_main(["zip", str(missing)])
-
-
-def test_cli_zip_raises_when_tree_missing(tmp_path):
-    alignment = tmp_path / "toy.fasta"
-    _write_alignment(alignment)
-    with pytest.raises(SystemExit, match="Tree file not found"):
-        ecomp_main([
-            "zip",
-            str(alignment),
-            "--tree",
-            str(tmp_path / "nope.tree"),
-        ])
-
-
-def test_cli_zip_raises_when_tree_unreadable(tmp_path):
-    alignment = tmp_path / "toy.fasta"
-    _write_alignment(alignment)
-    bad_tree = tmp_path / "bad.tree"
+def _unreadable_tree(directory: Path) -> Path:
+    bad_tree = directory / "bad.tree"
     bad_tree.mkdir()
-    with pytest.raises(SystemExit, match="Failed to read tree file"):
-        ecomp_main([
-            "zip",
-            str(alignment),
-            "--tree",
-            str(bad_tree),
-        ])
-
-
-def test_cli_inspect_raises_when_archive_missing(tmp_path):
-    with pytest.raises(SystemExit, match="Archive not found"):
-        ecomp_main(["inspect", str(tmp_path / "ghost.ecomp")])
+    return bad_tree
+
+
+@pytest.mark.parametrize(
+    "build_args, match",
+    [
+        (lambda alignment, tmp: ["zip", str(tmp / "missing.fasta")], "Alignment not found"),
+        (
+            lambda alignment, tmp: ["zip", str(alignment), "--tree", str(tmp / "nope.tree")],
+            "Tree file not found",
+        ),
+        (
+            lambda alignment, tmp: ["zip", str(alignment), "--tree", str(_unreadable_tree(tmp))],
+            "Failed to read tree file",
+        ),
+        (lambda alignment, tmp: ["inspect", str(tmp / "ghost.ecomp")], "Archive not found"),
+    ],
+    ids=["alignment-missing", "tree-missing", "tree-unreadable", "archive-missing"],
+)
+def test_cli_error_paths(tmp_path, toy_alignment, build_args, match):
+    with pytest.raises(SystemExit, match=match):
+        ecomp_main(build_args(toy_alignment, tmp_path))
 
 
-def test_cli_alignment_length_alias(tmp_path, capsys):
+def test_cli_alignment_length_alias(tmp_path, run_cli, capsys):
     alignment = tmp_path / "toy.fasta"
-    alignment.write_text(">s1\nAC--\n>s2\nACGT\n")
+    alignment.write_bytes(b">s1\nAC--\n>s2\nACGT\n")
     archive = tmp_path / "toy.ecomp"
-    assert ecomp_main([
+    code, _ = run_cli([
         "zip",
         str(alignment),
         "-o",
         str(archive),
-    ]) == 0
-    capsys.readouterr()
+    ])
+    assert code == 0
 
     assert ecomp_main([
         "alignment_length",
@@ -196,74 +211,101 @@ def test_cli_alignment_length_alias(tmp_path, capsys):
     assert capsys.readouterr().out.strip() == "4"
 
 
-def test_cli_metric_subcommands(tmp_path, capsys):
-    alignment = tmp_path / "metrics.fasta"
-    alignment.write_text(">s1\nACGT\n>s2\nA-GT\n>s3\nATGT\n")
-    archive = tmp_path / "metrics.ecomp"
+def _decoded_frame(archive: Path):
+    payload, metadata, _ = read_archive(archive)
+    return decompress_alignment(payload, metadata)
 
-    assert ecomp_main([
-        "zip",
-        str(alignment),
-        "-o",
-        str(archive),
-    ]) == 0
-    capsys.readouterr()
 
-    frame = read_alignment(alignment)
+@pytest.fixture(scope="module")
+def metric_frame(metric_subcommand_archive):
+    alignment, archive = metric_subcommand_archive
+    return _decoded_frame(archive), archive
 
-    assert ecomp_main([
+
+@pytest.fixture(scope="module")
+def expected_metrics(metric_frame):
+    frame, _ = metric_frame
+    return {
+        "consensus": majority_rule_consensus(frame),
+        "column_base_counts": metrics_column_base_counts(frame, include_gaps=True),
+        "gap_fraction": metrics_column_gap_fraction(frame),
+        "shannon_entropy": metrics_column_shannon_entropy(frame),
+        "parsimony_informative": parsimony_informative_columns(frame),
+        "constant_columns": metrics_constant_columns(frame),
+        "variable_sites": metrics_variable_site_count(frame),
+        "percentage_identity": metrics_percentage_identity(frame),
+        "rcv": relative_composition_variability(frame),
+    }
+
+
+def test_decoded_metric_frame_matches_alignment(metric_frame):
+    frame, _ = metric_frame
+    assert frame.ids == METRIC_EXPECTED_IDS
+    assert frame.sequences == METRIC_EXPECTED_SEQUENCES
+
+
+def test_cli_metric_consensus(metric_frame, expected_metrics, run_cli):
+    _, archive = metric_frame
+    code, out = run_cli([
         "consensus_sequence",
         str(archive),
+        *SKIP_CHECKSUM_ARGS,
         "--header",
         "metric_consensus",
-    ]) == 0
-    consensus_output = capsys.readouterr().out.strip().splitlines()
-    assert consensus_output == [">metric_consensus", majority_rule_consensus(frame)]
+    ])
+    assert code == 0
+    consensus_output = out.strip().splitlines()
+    assert consensus_output == [">metric_consensus", expected_metrics["consensus"]]
 
-    assert ecomp_main([
+
+def test_cli_metric_column_base_counts(metric_frame, expected_metrics, run_cli):
+    _, archive = metric_frame
+    code, out = run_cli([
         "column_base_counts",
         str(archive),
+        *SKIP_CHECKSUM_ARGS,
         "--include-gaps",
         "--indent",
         "0",
-    ]) == 0
-    counts_output = json.loads(capsys.readouterr().out)
+    ])
+    assert code == 0
     expected_counts = [
         {"column": idx + 1, "counts": dict(counter)}
-        for idx, counter in enumerate(
-            metrics_column_base_counts(frame, include_gaps=True)
-        )
+        for idx, counter in enumerate(expected_metrics["column_base_counts"])
     ]
-    assert counts_output == expected_counts
+    assert out == json.dumps(expected_counts, indent=0) + "\n"
 
-    assert ecomp_main([
-        "gap_fraction",
-        str(archive),
-    ]) == 0
-    gap_lines = capsys.readouterr().out.strip().splitlines()
-    expected_gap = metrics_column_gap_fraction(frame)
-    for idx, line in enumerate(gap_lines, start=1):
-        column, value = line.split("\t")
-        assert int(column) == idx
-        assert value == f"{expected_gap[idx - 1]:.6f}"
 
-    assert ecomp_main([
-        "shannon_entropy",
+@pytest.mark.parametrize(
+    "command",
+    ["gap_fraction", "shannon_entropy"],
+)
+def test_cli_metric_column_values(metric_frame, expected_metrics, run_cli, command):
+    _, archive = metric_frame
+    code, out = run_cli([
+        command,
         str(archive),
-    ]) == 0
-    entropy_lines = capsys.readouterr().out.strip().splitlines()
-    expected_entropy = metrics_column_shannon_entropy(frame)
-    for idx, line in enumerate(entropy_lines, start=1):
+        *SKIP_CHECKSUM_ARGS,
+    ])
+    assert code == 0
+    lines = out.strip().splitlines()
+    expected = expected_metrics[command]
+    for idx, line in enumerate(lines, start=1):
         column, value = line.split("\t")
         assert int(column) == idx
-        assert value == f"{expected_entropy[idx - 1]:.6f}"
+        assert value == f"{expected[idx - 1]:.6f}"
 
-    assert ecomp_main([
+
+def test_cli_metric_parsimony_informative_sites(metric_frame, expected_metrics, run_cli):
+    _, archive = metric_frame
+    code, out = run_cli([
         "parsimony_informative_sites",
         str(archive),
-    ]) == 0
-    parsimony_lines = capsys.readouterr().out.strip().splitlines()
-    parsimony_mask = parsimony_informative_columns(frame)
+        *SKIP_CHECKSUM_ARGS,
+    ])
+    assert code == 0
+    parsimony_lines = out.strip().splitlines()
+    parsimony_mask = expected_metrics["parsimony_informative"]
     total_parsimony = sum(parsimony_mask)
     assert parsimony_lines[0] == f"total\t{total_parsimony}"
     if total_parsimony:
@@ -274,12 +316,17 @@ def test_cli_metric_subcommands(tmp_path, capsys):
     else:
         assert len(parsimony_lines) == 1
 
-    assert ecomp_main([
+
+def test_cli_metric_constant_columns(metric_frame, expected_metrics, run_cli):
+    _, archive = metric_frame
+    code, out = run_cli([
         "constant_columns",
         str(archive),
-    ]) == 0
-    constant_lines = capsys.readouterr().out.strip().splitlines()
-    constant_mask = metrics_constant_columns(frame)
+        *SKIP_CHECKSUM_ARGS,
+    ])
+    assert code == 0
+    constant_lines = out.strip().splitlines()
+    constant_mask = expected_metrics["constant_columns"]
     total_constant = sum(1 for value in constant_mask if value)
     assert constant_lines[0] == f"total\t{total_constant}"
     if total_constant:
@@ -288,78 +335,113 @@ def test_cli_metric_subcommands(tmp_path, capsys):
         )
         assert constant_lines[1] == f"indices\t{expected_indices}"
 
-    assert ecomp_main([
+
+def test_cli_metric_pairwise_identity(metric_frame, run_cli):
+    _, archive = metric_frame
+    code, out = run_cli([
         "pairwise_identity",
         str(archive),
-    ]) == 0
-    pairwise_lines = capsys.readouterr().out.strip().splitlines()
-    result = pairwise_identity_matrix(frame)
-    ids = frame.ids
-    assert pairwise_lines[0].split("\t") == ["id", *ids]
-    for row_index, line in enumerate(pairwise_lines[1 : 1 + len(ids)]):
-        parts = line.split("\t")
-        assert parts[0] == ids[row_index]
-        expected = [
-            "nan" if math.isnan(value) else f"{value:.6f}"
-            for value in result.matrix[row_index]
-        ]
-        assert parts[1:] == expected
-
-    coverage_offset = 1 + len(ids)
-    assert pairwise_lines[coverage_offset] == "# coverage"
-    assert pairwise_lines[coverage_offset + 1].split("\t") == ["id", *ids]
-    for row_index, line in enumerate(
-        pairwise_lines[coverage_offset + 2 : coverage_offset + 2 + len(ids)]
-    ):
-        parts = line.split("\t")
-        assert parts[0] == ids[row_index]
-        assert parts[1:] == [str(value) for value in result.coverage[row_index]]
+        *SKIP_CHECKSUM_ARGS,
+    ])
+    assert code == 0
+    assert out == PAIRWISE_IDENTITY_GOLDEN
 
-    assert ecomp_main([
-        "variable_sites",
-        str(archive),
-    ]) == 0
-    variable_output = capsys.readouterr().out.strip()
-    assert variable_output == str(metrics_variable_site_count(frame))
 
-    assert ecomp_main([
-        "percentage_identity",
-        str(archive),
-    ]) == 0
-    percentage_output = capsys.readouterr().out.strip()
-    expected_percentage = metrics_percentage_identity(frame)
-    expected_percentage_str = (
-        "nan"
-        if math.isnan(expected_percentage)
-        else f"{expected_percentage:.6f}"
-    )
-    assert percentage_output == expected_percentage_str
+def _format_float(value: float) -> str:
+    return "nan" if math.isnan(value) else f"{value:.6f}"
 
-    assert ecomp_main([
-        "rcv",
+
+@pytest.mark.parametrize(
+    "command, key, formatter",
+    [
+        ("variable_sites", "variable_sites", str),
+        ("percentage_identity", "percentage_identity", _format_float),
+        ("rcv", "rcv", _format_float),
+    ],
+)
+def test_cli_metric_scalar_summaries(metric_frame, expected_metrics, run_cli, command, key, formatter):
+    _, archive = metric_frame
+    code, out = run_cli([
+        command,
         str(archive),
-    ]) == 0
-    rcv_output = capsys.readouterr().out.strip()
-    expected_rcv = relative_composition_variability(frame)
-    assert rcv_output == f"{expected_rcv:.6f}"
+        *SKIP_CHECKSUM_ARGS,
+    ])
+    assert code == 0
+    assert out.strip() == formatter(expected_metrics[key])
 
-    assert ecomp_main([
+
+def test_cli_metric_distance_tree(metric_frame, tmp_path, run_cli):
+    frame, archive = metric_frame
+    code, out = run_cli([
         "distance_tree",
         str(archive),
-    ]) == 0
-    newick_output = capsys.readouterr().out.strip()
+        *SKIP_CHECKSUM_ARGS,
+    ])
+    assert code == 0
+    newick_output = out.strip()
     assert "(" in newick_output and newick_output.endswith(";")
     assert all(seq_id in newick_output for seq_id in frame.ids)
 
     tree_path = tmp_path / "tree.nwk"
-    assert ecomp_main([
+    code, out = run_cli([
         "distance_tree",
         str(archive),
+        *SKIP_CHECKSUM_ARGS,
         "--method",
         "upgma",
         "-o",
         str(tree_path),
-    ]) == 0
-    cli_message = capsys.readouterr().out.strip()
+    ])
+    assert code == 0
+    cli_message = out.strip()
     assert "Wrote Newick tree" in cli_message
     assert tree_path.exists()
+
+
+def test_cli_metric_checksum_enforced(metric_subcommand_archive, tmp_path):
+    _, archive = metric_subcommand_archive
+    payload, metadata, _ = decode_archive(archive.read_bytes())
+    metadata["checksum_sha256"] = "deadbeef"
+    tampered = tmp_path / "tampered.ecomp"
+    tampered.write_bytes(encode_archive(payload, metadata))
+
+    with pytest.raises(SystemExit, match="Checksum mismatch"):
+        ecomp_main(["variable_sites", str(tampered)])
+
+
+METRIC_SUBCOMMAND_ALIASES = [
+    "con_seq",
+    "col_counts",
+    "gap_frac",
+    "entropy",
+    "parsimony",
+    "const_cols",
+    "pid",
+    "len_no_gaps",
+    "len_total",
+    "var_sites",
+    "pct_id",
+    "rcv",
+    "metrics",
+    "dist_tree",
+]
+
+
+@pytest.mark.parametrize("subcommand", METRIC_SUBCOMMAND_ALIASES)
+def test_cli_dispatch_smoke(metric_frame, run_cli, subcommand):
+    _, archive = metric_frame
+    code, out = run_cli([subcommand, str(archive), *SKIP_CHECKSUM_ARGS])
+    assert code == 0
+    assert out.strip()
+
+
+def test_cli_zip_sharded_checksum_is_verified(tmp_path, toy_alignment, run_cli):
+    archive = tmp_path / "sharded.ecomp"
+    code, _ = run_cli(["zip", str(toy_alignment), "-o", str(archive), "--checksum-mode", "sharded"])
+    assert code == 0
+    _, metadata, _ = read_archive(archive)
+    assert metadata["checksum_mode"] == "sharded"
+
+    code, out = run_cli(["variable_sites", str(archive)])
+    assert code == 0
+    assert out.strip() == "1"
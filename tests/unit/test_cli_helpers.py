@@ -1,7 +1,8 @@
 import pytest
 
-from ecomp.cli import _verify_checksum, build_parser, main
+from ecomp.cli import _load_alignment_from_archive, _verify_checksum, build_parser, main
 from ecomp.diagnostics.checksums import alignment_checksum
+from ecomp.storage import read_archive, write_archive
 
 
 def test_verify_checksum_passes():
@@ -22,6 +23,15 @@ def test_verify_checksum_ignored_when_missing():
     _verify_checksum(["ACGT"], {})
 
 
+def test_load_alignment_rejects_tampered_archive(metrics_archive, tmp_path):
+    _load_alignment_from_archive(metrics_archive, None)
+    payload, metadata, _ = read_archive(metrics_archive)
+    metadata["checksum_sha256"] = alignment_checksum(["AAAA"])
+    tampered = write_archive(tmp_path / "tampered.ecomp", payload, metadata)
+    with pytest.raises(SystemExit, match="Checksum mismatch"):
+        _load_alignment_from_archive(tampered, None)
+
+
 def test_build_parser_registers_subcommands():
     parser = build_parser()
     # The parser stores subcommands under the first subparsers action.
@@ -55,3 +55,14 @@ def test_zip_strict_legacy_python(monkeypatch: pytest.MonkeyPatch) -> None:
 
     with pytest.raises(ValueError, match="different lengths"):
         list(_compat.zip_strict([1], ["alpha", "beta"]))
+
+
+@pytest.mark.parametrize("version", [(3, 9, 0), (3, 11, 0)])
+def test_bit_count_matches_across_versions(monkeypatch: pytest.MonkeyPatch, version) -> None:
+    if version >= (3, 10) and sys.version_info < (3, 10):
+        pytest.skip("int.bit_count requires Python >= 3.10")
+    monkeypatch.setattr("ecomp._compat.sys.version_info", version)
+
+    assert _compat.bit_count(0) == 0
+    assert _compat.bit_count(0b1011) == 3
+    assert _compat.bit_count(int.from_bytes(b"\xff" * 64, "little")) == 512
@@ -1,5 +1,11 @@
 from ecomp.io import alignment_from_sequences
-from ecomp.compression.consensus import collect_column_profiles
+import pytest
+
+from ecomp.compression.consensus import (
+    collect_column_profiles,
+    iter_column_profile_windows,
+    iter_column_profiles,
+)
 
 
 def test_collect_column_profiles_identifies_consensus_and_deviations():
@@ -31,3 +37,47 @@ def test_consensus_prefers_lexicographically_smaller_char_on_tie():
 def test_collect_column_profiles_handles_zero_length_sequences():
     frame = alignment_from_sequences(ids=["seq1"], sequences=[""])
     assert collect_column_profiles(frame) == []
+
+
+def test_collect_column_profiles_reads_through_permutation():
+    frame = alignment_from_sequences(
+        ids=["seq1", "seq2", "seq3"],
+        sequences=["AAAA", "AAAT", "AATA"],
+    )
+    columns = collect_column_profiles(frame, permutation=[2, 0, 1])
+    assert columns[2].deviations == ((0, "T"),)
+    assert columns[3].deviations == ((2, "T"),)
+
+
+def test_collect_column_profiles_matches_iterator_for_mixed_residues():
+    frame = alignment_from_sequences(
+        ids=["seq1", "seq2", "seq3", "seq4"],
+        sequences=["AC-GT", "AC-GA", "TCAG-", "tCAGA"],
+    )
+    assert collect_column_profiles(frame, permutation=[3, 1, 0, 2]) == list(
+        iter_column_profiles(frame, permutation=[3, 1, 0, 2])
+    )
+
+
+def test_collect_column_profiles_falls_back_for_wide_characters():
+    frame = alignment_from_sequences(ids=["seq1", "seq2"], sequences=["AΩ", "AΩ"])
+    columns = collect_column_profiles(frame)
+    assert [column.consensus for column in columns] == ["A", "Ω"]
+    assert columns == list(iter_column_profiles(frame))
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 10])
+def test_iter_column_profile_windows_matches_collect(window):
+    frame = alignment_from_sequences(
+        ids=["seq1", "seq2", "seq3", "seq4"],
+        sequences=["AC-GT", "AC-GA", "TCAG-", "tCAGA"],
+    )
+    assert list(iter_column_profile_windows(frame, [3, 1, 0, 2], window=window)) == (
+        collect_column_profiles(frame, permutation=[3, 1, 0, 2])
+    )
+
+
+def test_iter_column_profile_windows_rejects_empty_window():
+    frame = alignment_from_sequences(ids=["seq1"], sequences=["ACGT"])
+    with pytest.raises(ValueError):
+        list(iter_column_profile_windows(frame, window=0))
@@ -9,10 +9,12 @@ import pytest
 from ecomp.compression.encoding import (
     DecodingError,
     EncodingError,
+    _bit_positions,
     _build_dictionary,
     _decode_bitmask,
     _decode_residue_stream,
     _canonical_code_maps,
+    _huffman_fast_table,
     _pack_huffman_codes,
     _pack_codes,
     _unpack_codes,
@@ -21,6 +23,7 @@ from ecomp.compression.encoding import (
     _popcount,
     _trim_bitmask,
     _write_varint,
+    _write_varints,
     decode_blocks,
     encode_blocks,
 )
@@ -59,6 +62,14 @@ def test_encode_decode_round_trip():
     )
     assert decoded == blocks
 
+    streamed, stats = pipeline._encode_alignment_streaming(frame, None, bits_per_symbol)
+    assert streamed == payload
+    assert stats == {
+        "run_length_blocks": len(blocks),
+        "max_run_length": max(block.run_length for block in blocks),
+        "columns_with_deviations": 1,
+    }
+
 
 def test_encode_blocks_raises_for_invalid_run_length():
     block = RunLengthBlock(consensus="A", bitmask=b"\x00", residues=b"", run_length=0)
@@ -158,6 +169,7 @@ def test_trim_bitmask_and_popcount_helpers():
     assert trimmed == b"\xff\x00\x10"
     assert length == 3
     assert _popcount(trimmed) == 9
+    assert _trim_bitmask(bytearray(2)) == (b"", 0)
 
 
 def test_encode_char_validates_single_ascii_character():
@@ -243,10 +255,74 @@ def test_decode_residue_stream_huffman_path():
     assert unpacked == [0, 1, 1]
 
 
+def test_huffman_fast_table_covers_every_prefix():
+    _, decode_map, max_len = _canonical_code_maps(["A", "C", "G"], [1, 2, 2])
+    table = _huffman_fast_table(decode_map, max_len)
+    assert table == [("A", 1), ("A", 1), ("C", 2), ("G", 2)]
+
+
+def test_decode_residue_stream_huffman_long_codes_fall_back():
+    residues = [chr(ord("A") + index) for index in range(15)]
+    lengths = list(range(1, 15)) + [14]
+    encode_map, decode_map, max_len = _canonical_code_maps(residues, lengths)
+    assert max_len > 12
+    chars = ["A", "O", "N", "B"]
+    encoded = _pack_huffman_codes(encode_map, chars)
+    model = {"mode": 1, "decode_map": decode_map, "max_code_len": max_len}
+    alphabet_lookup = {char: index for index, char in enumerate(residues)}
+    result = _decode_residue_stream(
+        "A", bytes([0b00001111]), encoded, {"A": model}, bits_per_symbol=4, alphabet_lookup=alphabet_lookup
+    )
+    assert _unpack_codes(result, 4, 4) == [alphabet_lookup[char] for char in chars]
+    with pytest.raises(DecodingError, match="Insufficient"):
+        _decode_residue_stream(
+            "A", bytes([0b00001111]), encoded[:-1], {"A": model}, bits_per_symbol=4, alphabet_lookup=alphabet_lookup
+        )
+
+
+@pytest.mark.parametrize("bits_per_symbol", [1, 3, 5, 8])
+def test_pack_codes_long_streams_match_short_path(bits_per_symbol):
+    codes = [(index * 7) % (1 << bits_per_symbol) for index in range(301)]
+    packed = _pack_codes(codes, bits_per_symbol)
+    assert len(packed) == (len(codes) * bits_per_symbol + 7) // 8
+    # Packing in short slices exercises the loop; byte-aligned slices concatenate cleanly.
+    step = 8
+    expected = b"".join(
+        _pack_codes(codes[start : start + step], bits_per_symbol) for start in range(0, len(codes), step)
+    )
+    assert packed == expected
+    assert _unpack_codes(packed, len(codes), bits_per_symbol) == codes
+    with pytest.raises(EncodingError):
+        _unpack_codes(packed[: len(packed) // 2], len(codes), bits_per_symbol)
+
+
 def test_decode_blocks_handles_empty_payload():
     assert decode_blocks(b"", bitmask_bytes=1, bits_per_symbol=1, alphabet=["A"]) == []
 
 
+@pytest.mark.parametrize("count", [0, 3, 200])
+def test_write_varints_matches_single_writer(count):
+    values = [(index * 2654435761) % (1 << (7 * (index % 10) + 1)) for index in range(count)]
+    assert _write_varints(values) == b"".join(_write_varint(value) for value in values)
+
+
+@pytest.mark.parametrize("count", [3, 200])
+def test_write_varints_rejects_negative_values(count):
+    with pytest.raises(EncodingError):
+        _write_varints([1] * (count - 1) + [-1])
+
+
+def test_bit_positions_long_masks_match_short_path():
+    mask = bytes([0b10000001, 0, 0b00010000] * 12)
+    expected = [
+        start * 8 + bit
+        for start in range(0, len(mask), 3)
+        for bit in _bit_positions(mask[start : start + 3])
+    ]
+    assert _bit_positions(mask) == expected
+    assert expected[:4] == [0, 7, 20, 24]
+
+
 def test_decode_bitmask_round_trip_modes():
     # mode 0 (raw)
     bitmask_raw = bytes([0b10101010, 0b01010101])
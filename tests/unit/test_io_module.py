@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pytest
+from Bio import AlignIO
 
 from ecomp.io import AlignmentFrame, alignment_from_sequences, read_alignment, write_alignment
 
@@ -10,6 +11,35 @@ def test_alignment_frame_alphabet_string_returns_sorted_unique():
     assert frame.alphabet_string() == "ACG"
 
 
+def test_alignment_from_sequences_finds_symbols_beyond_leading_sample():
+    sequences = ["A" * 5000 + "Z\xff", "-" * 5000 + "CA"]
+    frame = alignment_from_sequences(ids=["a", "b"], sequences=sequences)
+    assert frame.alphabet == ["-", "A", "C", "Z", "\xff"]
+
+
+def test_alignment_frame_residue_matrix_is_cached_and_read_only():
+    frame = alignment_from_sequences(ids=["a", "b"], sequences=["AC", "A-"])
+    matrix = frame.residue_matrix()
+    assert matrix.tolist() == [[ord("A"), ord("C")], [ord("A"), ord("-")]]
+    assert not matrix.flags.writeable
+    assert frame.residue_matrix() is matrix
+    assert frame == alignment_from_sequences(ids=["a", "b"], sequences=["AC", "A-"])
+
+    wide = alignment_from_sequences(ids=["a"], sequences=["AΩ"])
+    assert wide.residue_matrix() is None
+    assert AlignmentFrame(ids=["s1"], sequences=[""], alphabet=["A"]).residue_matrix().shape == (1, 0)
+
+
+def test_alignment_frame_residue_matrix_rebuilds_after_sequence_edits():
+    frame = alignment_from_sequences(ids=["a", "b"], sequences=["AC", "A-"])
+    matrix = frame.residue_matrix()
+    frame.sequences[1] = "GT"
+    assert frame.residue_matrix().tolist() == [[ord("A"), ord("C")], [ord("G"), ord("T")]]
+    frame.sequences = ["AΩ"]
+    assert frame.residue_matrix() is None
+    assert matrix.tolist() == [[ord("A"), ord("C")], [ord("A"), ord("-")]]
+
+
 def test_write_and_read_alignment_round_trip(tmp_path: Path):
     frame = alignment_from_sequences(
         ids=["seq1", "seq2"],
@@ -23,6 +53,32 @@ def test_write_and_read_alignment_round_trip(tmp_path: Path):
     assert restored.sequences == frame.sequences
 
 
+@pytest.mark.parametrize(
+    "body",
+    [
+        b">seq1 first record\nAC GT\nAC\n\n>seq2\tsecond\nACGTAC",
+        b">seq1\r\nACGT\r\n>seq2\r\nACGA\r\n",
+        b">seq1\n>seq2\n",
+    ],
+)
+def test_read_alignment_fasta_matches_biopython(tmp_path: Path, body: bytes):
+    path = tmp_path / "input.fasta"
+    path.write_bytes(body)
+    expected = AlignIO.read(str(path), "fasta")
+    frame = read_alignment(path)
+    assert frame.ids == [record.id for record in expected]
+    assert frame.sequences == [str(record.seq) for record in expected]
+    assert frame.alphabet == sorted(set("".join(frame.sequences)))
+
+
+@pytest.mark.parametrize("body", [b"", b"comment\n>seq1\nACGT\n", b">seq1\nACGT\n>seq2\nAC\n"])
+def test_read_alignment_fasta_defers_errors_to_biopython(tmp_path: Path, body: bytes):
+    path = tmp_path / "invalid.fasta"
+    path.write_bytes(body)
+    with pytest.raises(ValueError):
+        read_alignment(path)
+
+
 def test_alignment_frame_validation_errors():
     frame = AlignmentFrame(ids=["s1"], sequences=[""], alphabet=["A"])
     assert frame.num_sequences == 1
@@ -3,6 +3,8 @@ from __future__ import annotations
 import math
 from collections import Counter
 
+import pytest
+
 from ecomp import (
     PairwiseIdentityResult,
     alignment_length,
@@ -20,9 +22,12 @@ from ecomp import (
     relative_composition_variability,
     variable_site_count,
 )
+from ecomp.diagnostics import metrics
 
 
-def _example_alignment():
+@pytest.fixture(scope="module")
+def example_alignment():
+    # None of the metrics mutate the frame, so one instance serves every test.
     ids = ["s1", "s2", "s3", "s4"]
     sequences = [
         "ACGTT",
@@ -33,8 +38,8 @@ def _example_alignment():
     return alignment_from_sequences(ids, sequences)
 
 
-def test_column_base_counts_supports_gaps_toggle():
-    frame = _example_alignment()
+def test_column_base_counts_supports_gaps_toggle(example_alignment):
+    frame = example_alignment
     counts = column_base_counts(frame, include_gaps=False)
     counts_with_gaps = column_base_counts(frame, include_gaps=True)
 
@@ -43,8 +48,26 @@ def test_column_base_counts_supports_gaps_toggle():
     assert counts_with_gaps[1] == Counter({"T": 2, "C": 1, "-": 1})
 
 
-def test_majority_rule_consensus_uses_frequency_then_ordering():
-    frame = _example_alignment()
+def test_column_base_counts_match_wide_character_path():
+    sequences = ["AC-.T", "AC..T", "GT-AT"]
+    frame = alignment_from_sequences(["s1", "s2", "s3"], sequences)
+    wide = alignment_from_sequences(["s1", "s2", "s3"], [seq + "Ω" for seq in sequences])
+    for include_gaps in (False, True):
+        counts = column_base_counts(frame, gap_characters={"-", "."}, include_gaps=include_gaps)
+        assert counts == column_base_counts(
+            wide, gap_characters={"-", "."}, include_gaps=include_gaps
+        )[:-1]
+    assert counts[3] == Counter({".": 2, "A": 1})
+
+    # Key order must not depend on which path the alphabet selects.
+    ordered = column_base_counts(alignment_from_sequences(["s1", "s2"], ["TC", "AC"]))
+    wide_ordered = column_base_counts(alignment_from_sequences(["s1", "s2"], ["TCΩ", "ACΩ"]))
+    assert [list(column) for column in ordered] == [["A", "T"], ["C"]]
+    assert [list(column) for column in wide_ordered] == [["A", "T"], ["C"], ["Ω"]]
+
+
+def test_majority_rule_consensus_uses_frequency_then_ordering(example_alignment):
+    frame = example_alignment
     consensus = majority_rule_consensus(frame)
     assert consensus == "ATGYT"
 
@@ -91,8 +114,8 @@ def test_majority_rule_consensus_returns_x_for_protein_ties():
     assert consensus == "XX"
 
 
-def test_column_gap_fraction_values():
-    frame = _example_alignment()
+def test_column_gap_fraction_values(example_alignment):
+    frame = example_alignment
     fractions = column_gap_fraction(frame)
     assert fractions[0] == 0.0
     assert math.isclose(fractions[1], 0.25)
@@ -117,8 +140,8 @@ def test_majority_rule_consensus_adds_gap_placeholder():
     assert consensus == "-"
 
 
-def test_alignment_length_and_variable_sites():
-    frame = _example_alignment()
+def test_alignment_length_and_variable_sites(example_alignment):
+    frame = example_alignment
     assert alignment_length(frame) == 5
     assert alignment_length_excluding_gaps(frame) == 5
     assert variable_site_count(frame) == 2
@@ -133,16 +156,31 @@ def test_alignment_length_counts_gap_only_columns():
     assert alignment_length_excluding_gaps(frame) == 1
 
 
-def test_column_shannon_entropy_ignores_gaps():
-    frame = _example_alignment()
+def test_column_shannon_entropy_ignores_gaps(example_alignment):
+    frame = example_alignment
     entropies = column_shannon_entropy(frame)
     assert entropies[0] == 0.0
     assert math.isclose(entropies[1], 0.918295, rel_tol=1e-6)
     assert math.isclose(entropies[3], 1.0, rel_tol=1e-6)
 
 
-def test_parsimony_and_constant_masks():
-    frame = _example_alignment()
+def test_column_entropy_and_gap_fraction_match_wide_character_path():
+    sequences = ["AC-.T", "AC..T", "GT-AT"]
+    frame = alignment_from_sequences(["s1", "s2", "s3"], sequences)
+    wide = alignment_from_sequences(["s1", "s2", "s3"], [seq + "Ω" for seq in sequences])
+    gaps = {"-", "."}
+    assert column_gap_fraction(frame, gap_characters=gaps) == column_gap_fraction(
+        wide, gap_characters=gaps
+    )[:-1]
+    for value, expected in zip(
+        column_shannon_entropy(frame, gap_characters=gaps),
+        column_shannon_entropy(wide, gap_characters=gaps),
+    ):
+        assert math.isclose(value, expected, abs_tol=1e-12)
+
+
+def test_parsimony_and_constant_masks(example_alignment):
+    frame = example_alignment
     informative = parsimony_informative_columns(frame)
     constant = constant_columns(frame)
 
@@ -151,8 +189,29 @@ def test_parsimony_and_constant_masks():
     assert parsimony_informative_site_count(frame) == 1
 
 
-def test_pairwise_identity_matrix_matches_expected():
-    frame = _example_alignment()
+def test_column_classifiers_match_wide_character_path():
+    sequences = ["AC-.TA", "AC..TG", "GT-ATG", "GT.ATC"]
+    frame = alignment_from_sequences(["s1", "s2", "s3", "s4"], sequences)
+    wide = alignment_from_sequences(
+        ["s1", "s2", "s3", "s4"], [seq + "Ω" for seq in sequences]
+    )
+    gaps = {"-", "."}
+    assert constant_columns(frame, gap_characters=gaps) == [False, False, False, True, True, False]
+    assert parsimony_informative_columns(frame, gap_characters=gaps) == [
+        True, True, False, False, False, False
+    ]
+    assert variable_site_count(frame, gap_characters=gaps) == 3
+    assert constant_columns(wide, gap_characters=gaps)[:-1] == constant_columns(
+        frame, gap_characters=gaps
+    )
+    assert parsimony_informative_columns(wide, gap_characters=gaps)[:-1] == (
+        parsimony_informative_columns(frame, gap_characters=gaps)
+    )
+    assert variable_site_count(wide, gap_characters=gaps) == 3
+
+
+def test_pairwise_identity_matrix_matches_expected(example_alignment):
+    frame = example_alignment
     result = pairwise_identity_matrix(frame)
     assert isinstance(result, PairwiseIdentityResult)
     matrix = result.matrix
@@ -187,6 +246,26 @@ def test_pairwise_identity_nan_when_no_overlap():
     assert result.coverage[0][1] == 0
 
 
+def test_pairwise_identity_matrix_matches_reference_loop(monkeypatch):
+    sequences = ["AC-GT.A", "ACTGT-A", "..-----", "GCTGTTA"]
+    frame = alignment_from_sequences([f"s{i}" for i in range(4)], sequences)
+    # A tiny tile forces the column-tiled accumulation path.
+    monkeypatch.setattr(metrics, "_PAIRWISE_TILE_CELLS", 8)
+    result = pairwise_identity_matrix(frame, gap_characters={"-", "."})
+    expected = metrics._pairwise_identity_lists(sequences, {"-", "."})
+    assert result.coverage == expected.coverage
+    for row, expected_row in zip(result.matrix, expected.matrix):
+        for value, expected_value in zip(row, expected_row):
+            assert value == expected_value or (math.isnan(value) and math.isnan(expected_value))
+
+
+def test_pairwise_identity_matrix_handles_wide_characters():
+    frame = alignment_from_sequences(["s1", "s2"], ["AΩ-", "AΩT"])
+    result = pairwise_identity_matrix(frame)
+    assert result.matrix == [[1.0, 1.0], [1.0, 1.0]]
+    assert result.coverage == [[0, 2], [2, 0]]
+
+
 def test_constant_columns_handles_all_gap_column():
     frame = alignment_from_sequences(
         ["s1", "s2"],
@@ -196,8 +275,8 @@ def test_constant_columns_handles_all_gap_column():
     assert mask == [False, False]
 
 
-def test_percentage_identity_and_rcv():
-    frame = _example_alignment()
+def test_percentage_identity_and_rcv(example_alignment):
+    frame = example_alignment
     pct = percentage_identity(frame)
     assert 50.0 < pct < 100.0
     rcv = relative_composition_variability(frame)
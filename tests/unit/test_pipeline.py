@@ -1,3 +1,4 @@
+import functools
 import gzip
 import lzma
 import math
@@ -16,12 +17,27 @@ from ecomp.compression.pipeline import (
     decompress_alignment,
 )
 from ecomp.diagnostics.checksums import alignment_checksum
+from ecomp.diagnostics.metrics import column_gap_fraction
 from ecomp.compression.consensus import collect_column_profiles
 from ecomp.compression.rle import collect_run_length_blocks
 from ecomp.compression.encoding import encode_blocks
 
 
 def _build_raw_payload_and_metadata(frame):
+    payload, metadata = _cached_raw_payload_and_metadata(
+        tuple(frame.ids),
+        tuple(frame.sequences),
+        frame.metadata.get("source_format", "fasta"),
+    )
+    # Callers edit the metadata freely, so hand each one its own copy.
+    return payload, {**metadata, "alphabet": list(metadata["alphabet"])}
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_raw_payload_and_metadata(ids, sequences, source_format):
+    frame = alignment_from_sequences(
+        ids=list(ids), sequences=list(sequences), metadata={"source_format": source_format}
+    )
     column_profiles = collect_column_profiles(frame)
     alphabet = frame.alphabet
     symbol_lookup = {symbol: index for index, symbol in enumerate(alphabet)}
@@ -42,7 +58,7 @@ def _build_raw_payload_and_metadata(frame):
         "num_sequences": frame.num_sequences,
         "alignment_length": frame.alignment_length,
         "alphabet": frame.alphabet,
-        "source_format": frame.metadata.get("source_format", "fasta"),
+        "source_format": source_format,
         "checksum_sha256": alignment_checksum(frame.sequences),
         "run_length_blocks": len(run_length_blocks),
         "max_run_length": max((block.run_length for block in run_length_blocks), default=0),
@@ -58,6 +74,48 @@ def _build_raw_payload_and_metadata(frame):
     return raw_payload, metadata
 
 
+# Frames are never mutated by the tests, so each shape is built once per module.
+@pytest.fixture(scope="module")
+def pair_frame():
+    return alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "TTTT"])
+
+
+@pytest.fixture(scope="module")
+def near_pair_frame():
+    return alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "AAAT"])
+
+
+@pytest.fixture(scope="module")
+def single_frame():
+    return alignment_from_sequences(ids=["s1"], sequences=["AAAA"])
+
+
+# Compressed once per module; tests copy ``metadata`` before editing it because
+# ``decompress_alignment`` updates the mapping it is given.
+@pytest.fixture(scope="module")
+def compressed_pair(pair_frame):
+    return pair_frame, compress_alignment(pair_frame)
+
+
+@pytest.fixture(scope="module")
+def compressed_single(single_frame):
+    return single_frame, compress_alignment(single_frame)
+
+
+@functools.lru_cache(maxsize=None)
+def _xz_payload(payload):
+    # The xz tests only check round trips, so the fastest preset will do.
+    return lzma.compress(payload, preset=0)
+
+
+def _with_metadata(metadata, **overrides):
+    return {**metadata, **overrides}
+
+
+def _without_metadata(metadata, *keys):
+    return {key: value for key, value in metadata.items() if key not in keys}
+
+
 def test_maybe_use_gzip_fallback_replaces_payload(tmp_path):
     frame = alignment_from_sequences(ids=["s1"], sequences=["A" * 1024], metadata={})
     payload = b"X" * 4096
@@ -74,44 +132,55 @@ def test_maybe_use_gzip_fallback_replaces_payload(tmp_path):
     assert new_metadata["payload_encoding"] == "gzip"
 
 
-def test_decompress_alignment_supports_xz_payload():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "TTTT"])
+def test_decompress_alignment_supports_xz_payload(pair_frame):
+    frame = pair_frame
     payload, metadata = _build_raw_payload_and_metadata(frame)
     metadata["payload_encoding"] = "xz"
-    compressed_payload = lzma.compress(payload)
+    compressed_payload = _xz_payload(payload)
     rebuilt = decompress_alignment(compressed_payload, metadata)
     assert rebuilt.sequences == frame.sequences
 
 
-def test_decompress_alignment_handles_permutation_sidecar():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "TTTT"])
-    compressed = compress_alignment(frame)
-    metadata = dict(compressed.metadata)
-    metadata["sequence_permutation"] = [1, 0]
+@pytest.mark.parametrize("chunk_cells", [1, 1 << 18])
+def test_decompress_alignment_scatters_runs_across_chunks(monkeypatch, chunk_cells):
+    frame = alignment_from_sequences(
+        ids=[f"s{i}" for i in range(10)],
+        sequences=[
+            "ACGT" * 3 + "A" * 20 + ("C" if i % 3 == 0 else "G") * 7 + "T" * 5 + ("-" if i == 9 else "A")
+            for i in range(10)
+        ],
+    )
+    payload, metadata = _build_raw_payload_and_metadata(frame)
+    monkeypatch.setattr(pipeline, "_DECODE_CHUNK_CELLS", chunk_cells)
+    rebuilt = decompress_alignment(payload, metadata)
+    assert rebuilt.sequences == frame.sequences
+
+
+def test_decompress_alignment_handles_permutation_sidecar(compressed_pair):
+    frame, compressed = compressed_pair
+    metadata = _with_metadata(compressed.metadata, sequence_permutation=[1, 0])
     restored = decompress_alignment(compressed.payload, metadata)
     assert restored.ids == ["s2", "s1"]
     assert restored.sequences == frame.sequences[::-1]
 
 
-def test_decompress_alignment_handles_payload_sequence_ids():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "TTTT"])
-    compressed = compress_alignment(frame)
-    metadata = dict(compressed.metadata)
-    metadata["sequence_ids"] = ["s1", "s2"]
+def test_decompress_alignment_handles_payload_sequence_ids(compressed_pair):
+    frame, compressed = compressed_pair
+    metadata = _with_metadata(compressed.metadata, sequence_ids=["s1", "s2"])
     rebuilt = decompress_alignment(compressed.payload, metadata)
     assert rebuilt.ids == frame.ids
 
 
-def test_decompress_alignment_raises_for_unknown_encoding():
-    frame = alignment_from_sequences(ids=["s1"], sequences=["AAAA"])
+def test_decompress_alignment_raises_for_unknown_encoding(single_frame):
+    frame = single_frame
     payload, metadata = _build_raw_payload_and_metadata(frame)
     metadata["payload_encoding"] = "bogus"
     with pytest.raises(ValueError, match="Unsupported payload encoding"):
         decompress_alignment(payload, metadata)
 
 
-def test_decompress_alignment_raises_when_zstd_missing(monkeypatch):
-    frame = alignment_from_sequences(ids=["s1"], sequences=["AAAA"])
+def test_decompress_alignment_raises_when_zstd_missing(single_frame, monkeypatch):
+    frame = single_frame
     payload, metadata = _build_raw_payload_and_metadata(frame)
     metadata["payload_encoding"] = "zstd"
     monkeypatch.setattr(pipeline, "_ZSTD_DECOMPRESSOR", None)
@@ -161,56 +230,75 @@ def test_compress_decompress_preserves_sequences():
     assert compressed.metadata["bitmask_bytes"] == 1
     assert compressed.metadata["bits_per_symbol"] == 2
     assert compressed.metadata["payload_encoded_bytes"] <= compressed.metadata["payload_raw_bytes"]
-    assert compressed.metadata["payload_encoding"] in {"raw", "zlib"}
+    assert compressed.metadata["payload_encoding"] in {"raw", "zlib", "zstd"}
     assert compressed.metadata["codec"] == "ecomp"
 
 
-def test_decompress_raises_when_metadata_sequence_ids_mismatch():
-    frame = alignment_from_sequences(ids=["seq1"], sequences=["AAAA"])
+def test_compress_alignment_keeps_gzip_fallback_for_near_identical_sequences():
+    rng = random.Random(1)
+    reference = rng.choices("ACGT", k=1000)
+    sequences = []
+    for _ in range(20):
+        sequence = list(reference)
+        for _ in range(2):
+            sequence[rng.randrange(len(sequence))] = rng.choice("ACGT")
+        sequences.append("".join(sequence))
+    frame = alignment_from_sequences([f"s{i}" for i in range(20)], sequences)
+
     compressed = compress_alignment(frame)
-    bad_metadata = dict(compressed.metadata)
-    bad_metadata["sequence_ids"] = []
+    fasta_gzip = gzip.compress(_alignment_to_fasta_bytes(frame), compresslevel=6)
+    assert compressed.metadata["fallback"]["type"] == "gzip"
+    assert len(compressed.payload) <= len(fasta_gzip)
+    restored = decompress_alignment(compressed.payload, dict(compressed.metadata))
+    assert restored.sequences == sequences
 
-    try:
-        decompress_alignment(compressed.payload, bad_metadata)
-    except ValueError as exc:
-        assert "Metadata sequence count" in str(exc)
-    else:  # pragma: no cover - defensive
-        raise AssertionError("Expected ValueError for mismatched metadata")
 
+def test_compress_alignment_sees_sequence_edits_after_metrics_call():
+    frame = alignment_from_sequences(
+        ids=["seq1", "seq2", "seq3"], sequences=["ACGTACGT", "ACGTACGA", "ACGTTCGT"]
+    )
+    column_gap_fraction(frame)  # fills the cached residue matrix
+    frame.sequences[1] = "TTGTACGA"
+    frame.sequences.append("ACGTACGG")
+    frame.ids.append("seq4")
 
-def test_decompress_raises_when_bitmask_bytes_missing():
-    frame = alignment_from_sequences(ids=["seq1"], sequences=["AAAA"])
     compressed = compress_alignment(frame)
-    bad_metadata = dict(compressed.metadata)
-    bad_metadata.pop("bitmask_bytes", None)
+    reconstructed = decompress_alignment(compressed.payload, dict(compressed.metadata))
+
+    assert reconstructed.ids == frame.ids
+    assert reconstructed.sequences == frame.sequences
+    assert compressed.metadata["checksum_sha256"] == alignment_checksum(frame.sequences)
 
-    try:
+
+def test_decompress_raises_when_metadata_sequence_ids_mismatch(compressed_single):
+    _, compressed = compressed_single
+    bad_metadata = _with_metadata(compressed.metadata, sequence_ids=[])
+
+    with pytest.raises(ValueError, match="Metadata sequence count"):
         decompress_alignment(compressed.payload, bad_metadata)
-    except ValueError as exc:
-        assert "bitmask_bytes" in str(exc)
-    else:  # pragma: no cover - defensive
-        raise AssertionError("Expected ValueError for missing bitmask metadata")
 
 
-def test_decompress_allows_missing_bits_per_symbol():
-    frame = alignment_from_sequences(ids=["seq1"], sequences=["AAAA"])
-    compressed = compress_alignment(frame)
-    metadata = dict(compressed.metadata)
-    metadata.pop("bits_per_symbol", None)
+def test_decompress_raises_when_bitmask_bytes_missing(compressed_single):
+    _, compressed = compressed_single
+    bad_metadata = _without_metadata(compressed.metadata, "bitmask_bytes")
+
+    with pytest.raises(ValueError, match="bitmask_bytes"):
+        decompress_alignment(compressed.payload, bad_metadata)
+
+
+def test_decompress_allows_missing_bits_per_symbol(compressed_single):
+    frame, compressed = compressed_single
+    metadata = _without_metadata(compressed.metadata, "bits_per_symbol")
 
     reconstructed = decompress_alignment(compressed.payload, metadata)
     assert reconstructed.sequences == frame.sequences
 
 
 def test_fallback_to_gzip_when_smaller():
-    random.seed(0)
+    rng = random.Random(0)
     alphabet = "ACGT"
     ids = [f"seq{i}" for i in range(6)]
-    sequences = [
-        "".join(random.choice(alphabet) for _ in range(200))
-        for _ in ids
-    ]
+    sequences = ["".join(rng.choices(alphabet, k=200)) for _ in ids]
     frame = alignment_from_sequences(ids=ids, sequences=sequences)
     compressed = compress_alignment(frame)
     assert compressed.metadata.get("fallback", {}).get("type") == "gzip"
@@ -228,7 +316,7 @@ def test_similarity_order_prefers_nonbaseline():
     ]
     frame = alignment_from_sequences(ids=ids, sequences=sequences)
 
-    reordered, permutation, label = pipeline._compute_similarity_order(frame)  # type: ignore[attr-defined]
+    permutation, label = pipeline._select_sequence_order(frame)
     assert label.startswith("auto-")
     assert permutation != list(range(len(ids)))
 
@@ -258,10 +346,10 @@ def test_tree_guided_sequence_ordering():
         metadata={"tree_newick": newick},
     )
 
-    reordered, permutation, label = pipeline._compute_similarity_order(frame)  # type: ignore[attr-defined]
+    permutation, label = pipeline._select_sequence_order(frame)
     assert label == "tree"
     assert permutation == [1, 3, 0, 2]
-    assert reordered.ids == ["taxA", "taxB", "taxC", "taxD"]
+    assert [ids[idx] for idx in permutation] == ["taxA", "taxB", "taxC", "taxD"]
 
     compressed = compress_alignment(frame)
     assert compressed.metadata.get("ordering_strategy", "").startswith("auto") or compressed.metadata.get("ordering_strategy") == "tree"
@@ -292,43 +380,43 @@ def test_tree_guided_order_skipped_when_gap_heavy():
     assert restored.sequences == sequences
 
 
-def test_decompress_alignment_raises_on_column_length_mismatch():
-    frame = alignment_from_sequences(
-        ids=["s1", "s2"],
-        sequences=["ACGT", "ACGA"],
+def test_decompress_alignment_raises_on_column_length_mismatch(compressed_pair):
+    _, compressed = compressed_pair
+    bad_metadata = _with_metadata(
+        compressed.metadata, alignment_length=compressed.metadata["alignment_length"] + 1
     )
-    compressed = compress_alignment(frame)
-    bad_metadata = dict(compressed.metadata)
-    bad_metadata["alignment_length"] = bad_metadata["alignment_length"] + 1
 
     with pytest.raises(ValueError):
         decompress_alignment(compressed.payload, bad_metadata)
 
 
-def test_decompress_alignment_requires_bits_per_symbol_without_alphabet():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "AAAT"])
-    raw_payload, metadata = _build_raw_payload_and_metadata(frame)
-    bad_meta = dict(metadata)
-    bad_meta.pop("bits_per_symbol", None)
-    bad_meta["alphabet"] = []
-    with pytest.raises(ValueError):
-        decompress_alignment(raw_payload, bad_meta)
-
-
-def test_decompress_alignment_rejects_unknown_payload_encoding():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "AAAT"])
-    raw_payload, metadata = _build_raw_payload_and_metadata(frame)
-    bad_meta = dict(metadata)
-    bad_meta["payload_encoding"] = "unknown"
+@pytest.mark.parametrize(
+    ("overrides", "removed"),
+    [
+        ({"alphabet": []}, ("bits_per_symbol",)),
+        ({"payload_encoding": "unknown"}, ()),
+        ({"fallback": {"type": "zip"}}, ()),
+        ({"alignment_length": 3}, ()),
+    ],
+    ids=[
+        "bits-per-symbol-without-alphabet",
+        "unknown-payload-encoding",
+        "unknown-fallback-type",
+        "columns-exceed-expected",
+    ],
+)
+def test_decompress_alignment_rejects_bad_metadata(near_pair_frame, overrides, removed):
+    raw_payload, metadata = _build_raw_payload_and_metadata(near_pair_frame)
+    bad_meta = _with_metadata(_without_metadata(metadata, *removed), **overrides)
     with pytest.raises(ValueError):
         decompress_alignment(raw_payload, bad_meta)
 
 
-def test_decompress_alignment_supports_xz_encoding():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "AAAT"])
+def test_decompress_alignment_supports_xz_encoding(near_pair_frame):
+    frame = near_pair_frame
     raw_payload, metadata = _build_raw_payload_and_metadata(frame)
     metadata_xz = dict(metadata)
-    payload_xz = lzma.compress(raw_payload)
+    payload_xz = _xz_payload(raw_payload)
     metadata_xz["payload_encoding"] = "xz"
     metadata_xz["payload_encoded_bytes"] = len(payload_xz)
     restored = decompress_alignment(payload_xz, metadata_xz)
@@ -336,24 +424,6 @@ def test_decompress_alignment_supports_xz_encoding():
     assert restored.ids == frame.ids
 
 
-def test_decompress_alignment_handles_unknown_fallback_type():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "AAAT"])
-    raw_payload, metadata = _build_raw_payload_and_metadata(frame)
-    bad_meta = dict(metadata)
-    bad_meta["fallback"] = {"type": "zip"}
-    with pytest.raises(ValueError):
-        decompress_alignment(raw_payload, bad_meta)
-
-
-def test_decompress_alignment_raises_when_columns_exceed_expected():
-    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["AAAA", "AAAT"])
-    raw_payload, metadata = _build_raw_payload_and_metadata(frame)
-    bad_meta = dict(metadata)
-    bad_meta["alignment_length"] = metadata["alignment_length"] - 1
-    with pytest.raises(ValueError):
-        decompress_alignment(raw_payload, bad_meta)
-
-
 def test_choose_order_respects_env_override(monkeypatch):
     monkeypatch.setenv("ECOMP_SEQUENCE_ORDER", "mst")
     ids = ["s1", "s2", "s3"]
@@ -363,6 +433,6 @@ def test_choose_order_respects_env_override(monkeypatch):
         "AAAT",
     ]
     frame = alignment_from_sequences(ids=ids, sequences=sequences)
-    _, permutation, label = pipeline._compute_similarity_order(frame)  # type: ignore[attr-defined]
+    permutation, label = pipeline._select_sequence_order(frame)
     assert label == "mst"
     assert len(permutation) == len(ids)
@@ -1,28 +1,37 @@
 from pathlib import Path
 
 import base64
+import gzip
+import time
+from concurrent.futures import Future
 import zlib
+import numpy as np
 import pytest
 
 from ecomp.io import alignment_from_sequences
+from ecomp.compression import pipeline
 
 from ecomp.compression.pipeline import (
     _SEQ_ID_MAGIC,
     _ZSTD_DECOMPRESSOR,
     _WIDTH_TO_CODE,
     _alignment_to_fasta_bytes,
-    _build_distance_matrix,
     _build_permutation_chunk,
+    _compress_candidates,
     _compute_alignment_stats,
     _decode_permutation,
     _decode_sequence_ids,
-    _decode_residues,
+    _decode_varint,
     _encode_sequence_ids,
     _encode_varint,
     _extract_permutation_chunk,
-    _iter_deviation_indices,
+    _greedy_sequence_order,
     _maybe_use_gzip_fallback,
     _parse_fasta_bytes,
+    _pairwise_mismatches,
+    _parse_newick,
+    _sample_columns,
+    _scatter_deviations,
     _select_sample_indices,
 )
 from ecomp.compression.encoding import (
@@ -36,22 +45,67 @@ from ecomp.compression.encoding import (
 )
 
 
-def test_iter_deviation_indices_returns_expected_positions():
-    bitmask = bytes([0b00010101])
-    indices = _iter_deviation_indices(bitmask, num_sequences=8)
-    assert indices == [0, 2, 4]
+def _scatter(bitmask, residues, *, num_sequences, bits_per_symbol, alphabet, run_length=1):
+    """Scatter one block onto a '.'-filled buffer and return the decoded rows."""
 
+    buffer = np.full((num_sequences, run_length), ord("."), dtype=np.uint8)
+    _scatter_deviations(
+        buffer,
+        [RunLengthBlock(consensus=".", bitmask=bitmask, residues=residues, run_length=run_length)],
+        np.array([0], dtype=np.intp),
+        np.array([run_length], dtype=np.intp),
+        len(bitmask),
+        bits_per_symbol,
+        np.frombuffer("".join(alphabet).encode("ascii"), dtype=np.uint8),
+    )
+    return [row.tobytes().decode("ascii") for row in buffer]
+
+
+def test_scatter_deviations_places_residues_at_bitmask_positions():
+    rows = _scatter(
+        bytes([0b00010101]),
+        bytes([0b00011011]),  # packed values 0,1,2 for bits_per_symbol=2
+        num_sequences=8,
+        bits_per_symbol=2,
+        alphabet=["A", "C", "G", "T"],
+        run_length=2,
+    )
+    assert rows == ["AA", "..", "CC", "..", "GG", "..", "..", ".."]
 
-def test_decode_residues_round_trip():
-    data = bytes([0b00011011])  # packed values 0,1,2,3 for bits_per_symbol=2
-    alphabet = ["A", "C", "G", "T"]
-    residues = _decode_residues(data, count=4, bits_per_symbol=2, alphabet=alphabet)
-    assert residues == ["A", "C", "G", "T"]
+
+def test_scatter_deviations_ignores_padding_bits():
+    rows = _scatter(
+        bytes([0b10000001, 0b11111110]),
+        bytes([0b00011011]),
+        num_sequences=10,
+        bits_per_symbol=2,
+        alphabet=["A", "C", "G", "T"],
+    )
+    assert "".join(rows) == "A......C.G"
 
 
-def test_decode_residues_raises_on_insufficient_data():
+def test_scatter_deviations_raises_on_insufficient_data():
     with pytest.raises(ValueError):
-        _decode_residues(b"\x00", count=5, bits_per_symbol=3, alphabet=["A", "C", "G", "T"])
+        _scatter(
+            bytes([0b00011111]),
+            b"\x00",
+            num_sequences=8,
+            bits_per_symbol=3,
+            alphabet=["A", "C", "G", "T"],
+        )
+
+
+def test_scatter_deviations_unaligned_width_round_trip():
+    codes = [5, 0, 7, 2, 3]
+    alphabet = ["A", "C", "G", "T", "N", "R", "Y", "-"]
+    rows = _scatter(
+        bytes([0b00011111]),
+        _pack_codes(codes, bits_per_symbol=3),
+        num_sequences=5,
+        bits_per_symbol=3,
+        alphabet=alphabet,
+    )
+    assert "".join(rows) == "".join(alphabet[code] for code in codes)
 
 
 def test_decode_residue_stream_mode_zero_round_trip():
@@ -73,8 +127,7 @@ def test_decode_residue_stream_mode_zero_round_trip():
         bits_per_symbol=2,
         alphabet_lookup=alphabet_lookup,
     )
-    decoded = _decode_residues(packed, count=1, bits_per_symbol=2, alphabet=["A", "C", "G", "T"])
-    assert decoded == ["T"]
+    assert packed == _pack_codes([3], bits_per_symbol=2)  # "T"
 
 
 def test_decode_residue_stream_huffman_round_trip():
@@ -100,8 +153,7 @@ def test_decode_residue_stream_huffman_round_trip():
         bits_per_symbol=2,
         alphabet_lookup=alphabet_lookup,
     )
-    decoded = _decode_residues(packed, count=2, bits_per_symbol=2, alphabet=["A", "C", "G", "T"])
-    assert decoded == ["G", "T"]
+    assert packed == _pack_codes([2, 3], bits_per_symbol=2)  # "G", "T"
 
 
 def test_decode_residue_stream_errors_when_model_missing():
@@ -147,6 +199,19 @@ def test_maybe_use_gzip_fallback_replaces_payload(tmp_path: Path):
     assert new_metadata["fallback"]["type"] == "gzip"
 
 
+def test_maybe_use_gzip_fallback_uses_pending_result(monkeypatch):
+    frame = alignment_from_sequences(ids=["s1", "s2"], sequences=["ACGT" * 10, "ACGT" * 10])
+    fasta_bytes = pipeline._alignment_to_fasta_bytes(frame)
+    pending = Future()
+    pending.set_result((fasta_bytes, gzip.compress(fasta_bytes)))
+    monkeypatch.setattr(pipeline, "_gzip_fasta", lambda _frame: pytest.fail("gzip ran twice"))
+    new_payload, new_metadata = _maybe_use_gzip_fallback(
+        frame, b"X" * 100, {"source_format": "fasta"}, pending=pending
+    )
+    assert new_metadata["payload_encoding"] == "gzip"
+    assert gzip.decompress(new_payload) == fasta_bytes
+
+
 def test_permutation_chunk_round_trip_various_widths():
     permutations = [
         [2, 0, 1],
@@ -186,11 +251,7 @@ def test_decode_permutation_dict_format_round_trip():
 def _decode_mode(encoded: bytes) -> int:
     idx = len(_SEQ_ID_MAGIC)
     idx += 1  # version byte
-    while True:
-        byte = encoded[idx]
-        idx += 1
-        if not byte & 0x80:
-            break
+    _, idx = _decode_varint(memoryview(encoded), idx)  # block length
     return encoded[idx]
 
 
@@ -204,6 +265,26 @@ def test_encode_sequence_ids_round_trip_zlib_mode():
     assert decoded == ids
 
 
+def test_encode_sequence_ids_ships_tiny_blocks_raw(monkeypatch):
+    def fail(*_args, **_kwargs):
+        raise AssertionError("tiny ID blocks should not be compressed")
+
+    monkeypatch.setattr(pipeline.zlib, "compress", fail)
+    ids = ["a", "b", "c"]
+    encoded = _encode_sequence_ids(ids)
+    assert _decode_mode(encoded) == 0
+    decoded, remainder = _decode_sequence_ids(encoded)
+    assert decoded == ids
+    assert remainder == b""
+
+
+def test_encode_sequence_ids_round_trip_multi_byte_lengths():
+    ids = ["x" * 200, "", "é" * 70]
+    decoded, remainder = _decode_sequence_ids(_encode_sequence_ids(ids))
+    assert decoded == ids
+    assert remainder == b""
+
+
 @pytest.mark.skipif(_ZSTD_DECOMPRESSOR is None, reason="zstd optional dependency not available")
 def test_encode_sequence_ids_round_trip_zstd_mode():
     ids = [f"tax{str(i).zfill(4)}" for i in range(512)]
@@ -300,10 +381,121 @@ def test_decode_sequence_ids_error_conditions():
 def test_select_sample_indices_and_distance_matrix():
     indices = _select_sample_indices(1000, cap=10)
     assert indices[0] == 0 and indices[-1] == 999
-    matrix = _build_distance_matrix(["AAAA", "AAAT", "AATT"], sample_indices=[2, 3])
+    matrix = _pairwise_mismatches(_sample_columns(["AAAA", "AAAT", "AATT"], [2, 3]))
     assert matrix[1][2] == 1
 
 
 def test_compute_alignment_stats_handles_empty_input():
     empty = alignment_from_sequences(ids=["s1"], sequences=[""])
     assert _compute_alignment_stats(empty) is None
+
+
+def test_compress_candidates_thread_pool_matches_serial(monkeypatch):
+    raw_payload = b"ACGT" * 512
+    serial = _compress_candidates(raw_payload)
+    monkeypatch.setattr(pipeline, "_PARALLEL_CODEC_THRESHOLD", 0)
+    pooled = _compress_candidates(raw_payload)
+    assert [label for label, _, _ in pooled] == [label for label, _, _ in serial]
+    assert [payload for _, payload, _ in pooled] == [payload for _, payload, _ in serial]
+
+
+def test_compress_alignment_threaded_checksum_matches_serial(monkeypatch):
+    frame = alignment_from_sequences(ids=["s1", "s2", "s3"], sequences=["ACGTA", "ACGTT", "AC-TA"])
+    serial = pipeline.compress_alignment(frame)
+    monkeypatch.setattr(pipeline, "_CPU_COUNT", 2)
+    monkeypatch.setattr(pipeline, "_PARALLEL_CHECKSUM_MIN_CELLS", 0)
+    threaded = pipeline.compress_alignment(frame)
+    assert threaded.metadata == serial.metadata
+    assert threaded.payload == serial.payload
+
+
+def test_compress_alignment_joins_checksum_job_when_encoding_fails(monkeypatch):
+    frame = alignment_from_sequences(ids=["s1", "s2", "s3"], sequences=["ACGTA", "ACGTT", "AC-TA"])
+    finished = []
+    checksum = pipeline.alignment_checksum
+
+    def slow_checksum(sequences, *, mode):
+        time.sleep(0.05)
+        finished.append(True)
+        return checksum(sequences, mode=mode)
+
+    def failing_candidates(_raw_payload):
+        raise RuntimeError("codec failure")
+
+    monkeypatch.setattr(pipeline, "_CPU_COUNT", 2)
+    monkeypatch.setattr(pipeline, "_PARALLEL_CHECKSUM_MIN_CELLS", 0)
+    monkeypatch.setattr(pipeline, "alignment_checksum", slow_checksum)
+    monkeypatch.setattr(pipeline, "_compress_candidates", failing_candidates)
+    with pytest.raises(RuntimeError, match="codec failure"):
+        pipeline.compress_alignment(frame)
+    assert finished == [True]
+
+
+def test_compress_alignment_joins_fallback_job_when_codecs_fail(monkeypatch):
+    frame = alignment_from_sequences(ids=["s1", "s2", "s3"], sequences=["ACGTA", "ACGTT", "AC-TA"])
+    finished = []
+    gzip_fasta = pipeline._gzip_fasta
+
+    def slow_gzip_fasta(target):
+        time.sleep(0.05)
+        finished.append(True)
+        return gzip_fasta(target)
+
+    def failing_candidates(_raw_payload):
+        raise RuntimeError("codec failure")
+
+    monkeypatch.setattr(pipeline, "_CPU_COUNT", 2)
+    monkeypatch.setattr(pipeline, "_PARALLEL_CODEC_THRESHOLD", 0)
+    monkeypatch.setattr(pipeline, "_gzip_fasta", slow_gzip_fasta)
+    monkeypatch.setattr(pipeline, "_compress_candidates", failing_candidates)
+    with pytest.raises(RuntimeError, match="codec failure"):
+        pipeline.compress_alignment(frame)
+    assert finished == [True]
+
+
+def test_compress_candidates_tries_zlib_for_small_payloads_or_without_zstd(monkeypatch):
+    raw_payload = b"ACGT" * 64
+    if _ZSTD_DECOMPRESSOR is not None:
+        labels = [label for label, _, _ in _compress_candidates(raw_payload)]
+        assert labels == ["raw", "zstd", "zlib", "xz"]
+        monkeypatch.setattr(pipeline, "_ZLIB_CANDIDATE_MAX_BYTES", len(raw_payload))
+        labels = [label for label, _, _ in _compress_candidates(raw_payload)]
+        assert "zstd" in labels and "zlib" not in labels
+    monkeypatch.setattr(pipeline, "_ZSTD_COMPRESSOR", None)
+    labels = [label for label, _, _ in _compress_candidates(raw_payload)]
+    assert labels == ["raw", "zlib", "xz"]
+
+
+def test_greedy_sequence_order_follows_nearest_neighbours():
+    dist = [
+        [0, 3, 1, 2],
+        [3, 0, 2, 1],
+        [1, 2, 0, 3],
+        [2, 1, 3, 0],
+    ]
+    assert _greedy_sequence_order(dist) == [0, 2, 1, 3]
+    assert _greedy_sequence_order([]) == []
+
+
+def test_pairwise_mismatches_tiles_match_single_block(monkeypatch):
+    samples = _sample_columns(["ACGTAC", "ACGTTT", "TTGTAC", "ACG-AC", "AAAAAA"], range(6))
+    expected = _pairwise_mismatches(samples)
+    monkeypatch.setattr(pipeline, "_DISTANCE_TILE_BYTES", 6)
+    tiled = _pairwise_mismatches(samples)
+    assert tiled.tolist() == expected.tolist()
+    assert expected[0][4] == 4 and expected[4][0] == 4
+
+
+def test_parse_newick_handles_labels_lengths_and_deep_nesting():
+    root = _parse_newick("(a:1,(b:2,c:3)x:4)y:5;")
+    assert root.label == "y"
+    assert [child.label for child in root.children] == ["a", "x"]
+    assert [leaf.label for leaf in root.children[1].children] == ["b", "c"]
+
+    depth = 5000
+    deep = _parse_newick("(" * depth + "a" + ",b)" * depth + ";")
+    assert deep.children[1].label == "b"
+
+    for malformed in ("(a,b", "a,b;", "(a,b));", "(a,b);extra;"):
+        with pytest.raises(ValueError):
+            _parse_newick(malformed)
@@ -49,6 +49,18 @@ def test_decompress_file_detects_checksum_mismatch(tmp_path: Path) -> None:
         decompress_file(archive_path)
 
 
+def test_sharded_checksum_mode_round_trips(tmp_path: Path) -> None:
+    alignment = tmp_path / "example.fasta"
+    _write_alignment(alignment, ">s1\nACGT\n>s2\nACGA\n")
+
+    archive_path, _ = compress_file(alignment, checksum_mode="sharded")
+    _, metadata, _ = read_archive(archive_path)
+    assert metadata["checksum_mode"] == "sharded"
+
+    restored = decompress_file(archive_path, output_path=tmp_path / "restored.fasta")
+    assert restored.read_text() == alignment.read_text()
+
+
 def test_version_attribute_present() -> None:
     assert isinstance(__version__, str)
     assert __version__
@@ -2,6 +2,7 @@ import math
 
 from ecomp.io import alignment_from_sequences
 from ecomp.compression.consensus import collect_column_profiles
+from ecomp.compression import rle
 from ecomp.compression.rle import collect_run_length_blocks
 
 
@@ -26,3 +27,17 @@ def test_run_length_blocks_group_identical_columns():
     assert second_block.run_length == 1
     assert int.from_bytes(second_block.bitmask, "little") == 0b10
     assert second_block.residues == b"\x80"
+
+
+def test_batched_signatures_match_per_column_path(monkeypatch):
+    frame = alignment_from_sequences(
+        ids=[f"seq{i}" for i in range(11)],
+        sequences=["ACGT-ACGTA"] * 6 + ["TCGA-ACGAA", "ACGTTTCGTA", "GGGT-ACCTA", "ACGT-ACGTA", "A-GTNACGTA"],
+    )
+    columns = collect_column_profiles(frame)
+    symbol_lookup = {symbol: index for index, symbol in enumerate(frame.alphabet)}
+    expected = [
+        rle._column_signature(column, frame.num_sequences, symbol_lookup, 3) for column in columns
+    ]
+    monkeypatch.setattr(rle, "_VECTOR_SIGNATURE_MIN_DEVIATIONS", 1)
+    assert rle._column_signatures(columns, frame.num_sequences, symbol_lookup, 3) == expected
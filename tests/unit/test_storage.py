@@ -3,6 +3,7 @@ from pathlib import Path
 
 import pytest
 
+from ecomp import storage
 from ecomp.config import (
     FORMAT_VERSION_TUPLE,
     HEADER_MAGIC,
@@ -10,7 +11,9 @@ from ecomp.config import (
     LEGACY_HEADER_STRUCT,
 )
 from ecomp.storage import (
+    decode_archive,
     derive_metadata_path,
+    encode_archive,
     read_archive,
     read_metadata,
     read_payload,
@@ -35,6 +38,34 @@ def test_write_and_read_archive_round_trip(tmp_path: Path):
     assert read_payload(path) == payload
 
 
+def test_read_archive_mapped_and_buffered_paths_agree(tmp_path: Path, monkeypatch):
+    payload = bytes(range(256)) * 4
+    metadata = {"codec": "ecomp", "alignment_length": 1024}
+    path = write_archive(tmp_path / "example.ecomp", payload, metadata)
+
+    buffered = read_archive(path)
+    monkeypatch.setattr(storage, "_MMAP_MIN_ARCHIVE_BYTES", 0)
+    assert read_archive(path) == buffered == (payload, metadata, FORMAT_VERSION_TUPLE)
+
+
+def test_encode_archive_matches_written_file(tmp_path: Path):
+    payload = b"in-memory"
+    metadata = {"codec": "ecomp", "num_sequences": 2}
+    path = write_archive(tmp_path / "example.ecomp", payload, metadata)
+
+    data = encode_archive(payload, metadata)
+    assert data == path.read_bytes()
+    assert decode_archive(data) == (payload, metadata, FORMAT_VERSION_TUPLE)
+
+
+def test_decode_archive_rejects_legacy_and_short_data():
+    with pytest.raises(ValueError, match="too short"):
+        decode_archive(b"EC")
+    legacy = struct.pack(LEGACY_HEADER_STRUCT, HEADER_MAGIC, 0, 1, 0, 3) + b"abc"
+    with pytest.raises(ValueError, match="metadata sidecar"):
+        decode_archive(legacy)
+
+
 def test_write_payload_alias(tmp_path: Path):
     payload = b"alias"
     metadata = {"foo": "bar"}
@@ -89,6 +120,32 @@ def test_metadata_round_trip(tmp_path: Path):
     assert read_metadata(path) == metadata
 
 
+def test_metadata_compression_is_size_gated(tmp_path: Path):
+    small = {"codec": "ecomp", "alignment_length": 100}
+    small_path = write_metadata(tmp_path / "small.json", small)
+    assert small_path.read_bytes().startswith(b"{")
+
+    large = {"codec": "ecomp", "sequence_ids": [f"taxon_{i:04d}" for i in range(200)]}
+    large_path = write_metadata(tmp_path / "large.json", large)
+    assert large_path.read_bytes().startswith(b"ECMZ")
+    assert read_metadata(large_path) == large
+
+
+def test_metadata_round_trip_without_orjson(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage, "orjson", None)
+    metadata = {"b": [1, 2, 3], "a": "ünïcode", "c": {"ratio": 0.25}}
+    path = write_metadata(tmp_path / "stdlib.json", metadata)
+    assert read_metadata(path) == metadata
+
+
+def test_metadata_keeps_non_finite_floats_and_ascii_escapes(tmp_path: Path):
+    metadata = {"x": float("nan"), "inf": float("inf"), "name": "ü"}
+    path = write_metadata(tmp_path / "special.json", metadata)
+    assert path.read_bytes() == b'{"inf":Infinity,"name":"\\u00fc","x":NaN}\n'
+    restored = read_metadata(path)
+    assert restored["inf"] == float("inf") and restored["x"] != restored["x"]
+
+
 def test_legacy_archive_requires_metadata(tmp_path: Path):
     payload = b"legacy"
     archive = tmp_path / "legacy.ecomp"